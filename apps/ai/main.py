@@ -1,13 +1,29 @@
 import os
 import math
+import asyncio
+import multiprocessing
 import tempfile
 import time
 import json
+import urllib.parse
 import urllib.request
+import http.client
 import subprocess
 import wave
 import hashlib
-from typing import Any, Dict, Optional
+import struct
+import threading
+import queue
+import functools
+import contextlib
+import logging
+from collections import OrderedDict
+import heapq
+import bisect
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
 
 import whisper
 import cv2
@@ -17,8 +33,23 @@ from fastapi import Body
 import torch
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 
-app = FastAPI(title="AI Lab (Audio)", version="0.3.2")
+logger = logging.getLogger(__name__)
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(_app):
+    # Reference videos load in the background so startup isn't held up by long ones.
+    preload = asyncio.create_task(preload_references())
+    try:
+        yield
+    finally:
+        preload.cancel()
+        shutdown_executors()
+
+
+app = FastAPI(title="AI Lab (Audio)", version="0.3.2", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,10 +68,15 @@ _embed_inference = None
 _embed_init_error: Optional[str] = None
 EMBED_MODEL_ID = "pyannote/embedding"
 EMBED_MODEL_ID = "pyannote/wespeaker-voxceleb-resnet34-LM"
-_pose = None
+_pose_instances: Dict[int, List[Any]] = {}
+_pose_instances_lock = threading.Lock()
 _mmpose_detector = None
 _mmpose_pose = None
 _mmpose_init_error = None
+_pose_pool = None
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+_model_load_lock = threading.Lock()
 
 MMPOSE_DET_CONFIG = "mmdet::yolox/yolox_tiny_8xb8-300e_coco.py"
 MMPOSE_DET_CHECKPOINT = (
@@ -92,6 +128,93 @@ CHOREO_DANGLE_WEIGHT = _float_env("CHOREO_DANGLE_WEIGHT", 1.5)
 CHOREO_SMOOTH_WINDOW = _int_env("CHOREO_SMOOTH_WINDOW", 5)
 CHOREO_TRIM_ENERGY = _float_env("CHOREO_TRIM_ENERGY", 0.05)
 CHOREO_NORMALIZE_ROTATE = _bool_env("CHOREO_NORMALIZE_ROTATE", True)
+DTW_GATHER_BUDGET = _int_env("DTW_GATHER_BUDGET", 1_000_000)
+# "downsample" caps sequences at 300 frames for banded DTW; "multires" aligns
+# every frame with coarse-to-fine DTW constrained to DTW_FAST_RADIUS.
+CHOREO_DTW_MODE = os.getenv("CHOREO_DTW_MODE", "downsample")
+DTW_MODES = {"downsample", "multires"}
+DTW_FAST_RADIUS = _int_env("DTW_FAST_RADIUS", 10)
+DTW_PATH_MAX_POINTS = _int_env("DTW_PATH_MAX_POINTS", 200)
+POSE_CACHE_ENABLED = _bool_env("POSE_CACHE_ENABLED", True)
+POSE_CACHE_DIR = os.getenv("POSE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "ai-lab-pose-cache")
+POSE_CACHE_MAX_MB = _int_env("POSE_CACHE_MAX_MB", 512)
+POSE_CACHE_VERSION = 2
+POSE_DECODE_SEEK = _bool_env("POSE_DECODE_SEEK", False)
+POSE_SEEK_MIN_STRIDE = _int_env("POSE_SEEK_MIN_STRIDE", 4)
+POSE_MAX_SIDE = _int_env("POSE_MAX_SIDE", 960)
+POSE_ROI_CROP = _bool_env("POSE_ROI_CROP", False)
+POSE_ROI_PADDING = _float_env("POSE_ROI_PADDING", 0.3)
+POSE_WORKERS = _int_env("POSE_WORKERS", 2)
+# Frames decoded ahead of pose inference on a background thread; 0 decodes inline.
+POSE_PIPELINE_DEPTH = _int_env("POSE_PIPELINE_DEPTH", 4)
+# MediaPipe model_complexity (0 lite, 1 full, 2 heavy). /choreo/check and
+# reference registration default to their own setting so official checks can
+# run the heavy model while previews stay on the lighter one.
+POSE_MODEL_COMPLEXITY = _int_env("POSE_MODEL_COMPLEXITY", 1)
+CHOREO_CHECK_MODEL_COMPLEXITY = _int_env("CHOREO_CHECK_MODEL_COMPLEXITY", POSE_MODEL_COMPLEXITY)
+POSE_INSTANCE_POOL_MAX = _int_env("POSE_INSTANCE_POOL_MAX", 4)
+MMPOSE_BATCH_SIZE = max(_int_env("MMPOSE_BATCH_SIZE", 8), 1)
+# Detector-skip tracking: run YOLOX every N sampled frames and box the frames in
+# between from the last keypoints. 1 keeps the detect-every-frame behaviour.
+MMPOSE_DETECT_INTERVAL = max(_int_env("MMPOSE_DETECT_INTERVAL", 1), 1)
+MMPOSE_TRACK_MIN_SCORE = _float_env("MMPOSE_TRACK_MIN_SCORE", 0.5)
+MMPOSE_TRACK_PADDING = _float_env("MMPOSE_TRACK_PADDING", 1.25)
+UPLOAD_CHUNK_BYTES = _int_env("UPLOAD_CHUNK_BYTES", 1024 * 1024)
+# Streaming /asr: ffmpeg decodes fixed windows that repeat ASR_CHUNK_OVERLAP
+# seconds of the previous one, and each window is transcribed on its own.
+ASR_CHUNK_SECONDS = _float_env("ASR_CHUNK_SECONDS", 30.0)
+ASR_CHUNK_OVERLAP = _float_env("ASR_CHUNK_OVERLAP", 2.0)
+ASR_SAMPLE_RATE = 16000
+ASR_STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# Speech gating before Whisper: "energy" is a frame-RMS detector, "diarization"
+# (/asr_diarize only) reuses the pyannote speech turns. Regions are merged across
+# gaps up to ASR_VAD_MERGE_GAP seconds, energy regions shorter than
+# ASR_VAD_MIN_SPEECH are dropped, and the rest padded by ASR_VAD_PAD.
+VAD_MODES = {"energy", "diarization"}
+ASR_VAD_FRAME_MS = _int_env("ASR_VAD_FRAME_MS", 30)
+ASR_VAD_FLOOR_DB = _float_env("ASR_VAD_FLOOR_DB", -50.0)
+ASR_VAD_MIN_SPEECH = _float_env("ASR_VAD_MIN_SPEECH", 0.25)
+ASR_VAD_PAD = _float_env("ASR_VAD_PAD", 0.3)
+ASR_VAD_MERGE_GAP = _float_env("ASR_VAD_MERGE_GAP", 0.6)
+ASR_VAD_SPLICE_GAP = 0.2
+POSE_FETCH_TIMEOUT = _float_env("POSE_FETCH_TIMEOUT", 15.0)
+POSE_FETCH_MAX_MB = _int_env("POSE_FETCH_MAX_MB", 64)
+POSE_FETCH_POOL_SIZE = _int_env("POSE_FETCH_POOL_SIZE", 4)
+POSE_FETCH_CACHE_ENTRIES = _int_env("POSE_FETCH_CACHE_ENTRIES", 32)
+POSE_ARTIFACT_MAGIC = b"AIPOSE\x00\x00"
+POSE_ARTIFACT_VERSION = 1
+POSE_ARTIFACT_MEDIA_TYPE = "application/x-ai-lab-pose"
+POSE_ARTIFACT_DTYPES = {"float32": "<f4", "float16": "<f2"}
+# Bounded thread pools per model family. Pose defaults to one thread because the
+# in-process MMPose models are shared and not safe to call concurrently
+# (MediaPipe instances are checked out per video and can run in parallel).
+# "choreo" runs the numpy DTW/segmentation scoring, "upload" the staging writes.
+EXECUTOR_WORKERS = {
+    "asr": _int_env("ASR_WORKERS", 1),
+    "diarization": _int_env("DIARIZATION_WORKERS", 1),
+    "embedding": _int_env("EMBEDDING_WORKERS", 2),
+    "pose": _int_env("POSE_THREADS", 1),
+    "media": _int_env("MEDIA_WORKERS", 4),
+    "choreo": _int_env("CHOREO_WORKERS", 2),
+    "upload": _int_env("UPLOAD_WORKERS", 2),
+}
+# torch intra-op threads for the whole process (0 keeps torch's default).
+# torch.set_num_threads is process-wide, so Whisper and pyannote cannot get
+# separate counts in-process; when /asr_diarize runs both at once they share
+# this pool, so set it to roughly the cores meant for the two together.
+TORCH_THREADS = _int_env("TORCH_THREADS", 0)
+JOB_QUEUE_MAX = _int_env("JOB_QUEUE_MAX", 64)
+JOB_RESULT_TTL = _int_env("JOB_RESULT_TTL", 3600)
+JOB_CONCURRENCY = {
+    "asr_diarize": _int_env("JOB_CONCURRENCY_ASR_DIARIZE", 1),
+    "choreo_check": _int_env("JOB_CONCURRENCY_CHOREO_CHECK", 2),
+    "multimodal_compare": _int_env("JOB_CONCURRENCY_MULTIMODAL_COMPARE", 1),
+}
+JOB_PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+if TORCH_THREADS > 0:
+    torch.set_num_threads(TORCH_THREADS)
 
 
 def load_asr_model():
@@ -146,17 +269,47 @@ def load_embedding():
         return None
 
 
-def load_pose():
-    global _pose
-    if _pose:
-        return _pose
-    _pose = mp.solutions.pose.Pose(
+def _pose_complexity(model_complexity: Optional[int] = None) -> int:
+    if model_complexity is None:
+        return POSE_MODEL_COMPLEXITY
+    if model_complexity not in {0, 1, 2}:
+        raise HTTPException(status_code=400, detail="model_complexity must be 0, 1 or 2")
+    return int(model_complexity)
+
+
+def _check_complexity(model_complexity: Optional[int] = None) -> int:
+    return _pose_complexity(CHOREO_CHECK_MODEL_COMPLEXITY if model_complexity is None else model_complexity)
+
+
+def load_pose(model_complexity: Optional[int] = None):
+    """Check out a pooled MediaPipe Pose for one video; return it with _release_pose()."""
+    model_complexity = _pose_complexity(model_complexity)
+    with _pose_instances_lock:
+        idle = _pose_instances.get(model_complexity)
+        if idle:
+            return idle.pop()
+    return mp.solutions.pose.Pose(
         static_image_mode=False,
-        model_complexity=1,
+        model_complexity=model_complexity,
         enable_segmentation=False,
         smooth_landmarks=True,
     )
-    return _pose
+
+
+def _release_pose(pose, model_complexity: Optional[int] = None):
+    model_complexity = _pose_complexity(model_complexity)
+    try:
+        # Drop the tracking/smoothing state so the next video starts cold.
+        pose.reset()
+    except Exception:  # noqa: BLE001
+        pose.close()
+        return
+    with _pose_instances_lock:
+        idle = _pose_instances.setdefault(model_complexity, [])
+        if len(idle) < POSE_INSTANCE_POOL_MAX:
+            idle.append(pose)
+            return
+    pose.close()
 
 
 def load_mmpose_models():
@@ -180,6 +333,63 @@ def load_mmpose_models():
     return _mmpose_detector, _mmpose_pose
 
 
+def _init_pose_worker():
+    # Runs in each spawned worker: every process owns its own MediaPipe graphs.
+    _pose_instances.clear()
+    _release_pose(load_pose())
+
+
+def load_pose_pool():
+    global _pose_pool
+    if _pose_pool is None and POSE_WORKERS > 0:
+        _pose_pool = ProcessPoolExecutor(
+            max_workers=POSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pose_worker,
+        )
+    return _pose_pool
+
+
+def _get_executor(family: str):
+    with _executors_lock:
+        executor = _executors.get(family)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max(EXECUTOR_WORKERS.get(family, 1), 1),
+                thread_name_prefix=f"ai-{family}",
+            )
+            _executors[family] = executor
+        return executor
+
+
+async def _run_blocking(family: str, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(family), functools.partial(fn, *args, **kwargs))
+
+
+async def _load_model(family: str, loader, cached=None):
+    """Load a model on its family executor; ``cached`` (the loader's global) skips the queue."""
+    if cached is not None:
+        return cached
+
+    def locked():
+        with _model_load_lock:
+            return loader()
+
+    return await _run_blocking(family, locked)
+
+
+def shutdown_executors():
+    global _pose_pool
+    if _pose_pool is not None:
+        _pose_pool.shutdown(cancel_futures=True)
+        _pose_pool = None
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
 def _enabled_pose_backends():
     raw = os.getenv("POSE_BACKENDS", "mediapipe")
     return {item.strip() for item in raw.split(",") if item.strip()}
@@ -194,16 +404,664 @@ def _ensure_pose_backend(backend: str):
         raise HTTPException(status_code=501, detail="backend not enabled")
 
 
-def _extract_pose_frames(content: bytes, backend: str, sample_fps: int, max_seconds: int):
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty input file")
+class _StagedUpload:
+    """An upload streamed once into a named temp file and hashed on the way in."""
+
+    def __init__(self, path: str, sha256: str, size: int):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.discard()
+
+
+async def _stage_upload(upload: UploadFile, empty_detail: str = "Empty file"):
+    suffix = os.path.splitext(upload.filename or "")[1] or ".bin"
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+
+    def write(chunk):
+        digest.update(chunk)
+        tmp.write(chunk)
+
+    try:
+        with tmp:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await _run_blocking("upload", write, chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    staged = _StagedUpload(tmp.name, digest.hexdigest(), size)
+    if not size:
+        staged.discard()
+        raise HTTPException(status_code=400, detail=empty_detail)
+    return staged
+
+
+async def _stage_uploads(*uploads: UploadFile, empty_detail: str = "Empty file"):
+    staged = []
+    try:
+        for upload in uploads:
+            staged.append(await _stage_upload(upload, empty_detail))
+    except BaseException:
+        for item in staged:
+            item.discard()
+        raise
+    return staged
+
+
+def _sha256_file(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(UPLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_pose_cache_lock = threading.Lock()
+# Bytes under POSE_CACHE_DIR as of the last scan plus this process's writes; None until scanned.
+_pose_cache_bytes: Optional[int] = None
+# Temp files older than this are leftovers from a crashed write.
+_POSE_CACHE_TMP_MAX_AGE = 3600
+
+
+def _pose_cache_key(
+    content_hash: str,
+    kind: str,
+    backend: str,
+    sample_fps: float,
+    max_seconds: float,
+    model_complexity: Optional[int] = None,
+):
+    # Everything that changes the extracted frames or derived features must be part of the key.
+    params = {
+        "v": POSE_CACHE_VERSION,
+        "kind": kind,
+        "backend": backend,
+        "sample_fps": float(sample_fps or 0),
+        "max_seconds": float(max_seconds or 0),
+        "rotate": CHOREO_NORMALIZE_ROTATE,
+        "smooth_window": CHOREO_SMOOTH_WINDOW,
+        "trim_energy": CHOREO_TRIM_ENERGY,
+        "d_angle_weight": CHOREO_DANGLE_WEIGHT,
+        "seek": POSE_DECODE_SEEK,
+    }
+    if backend == "mediapipe":
+        params["preprocess"] = [POSE_MAX_SIDE, POSE_ROI_CROP, POSE_ROI_PADDING]
+        params["model_complexity"] = _pose_complexity(model_complexity)
+    if backend == "mmpose":
+        params["mmpose_tracking"] = [MMPOSE_DETECT_INTERVAL, MMPOSE_TRACK_MIN_SCORE, MMPOSE_TRACK_PADDING]
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"{content_hash}-{digest}"
+
+
+def _pose_cache_path(key: str):
+    return os.path.join(POSE_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _pose_cache_get(key: str):
+    if not POSE_CACHE_ENABLED:
+        return None
+    path = _pose_cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            result = json.load(fh)
+        os.utime(path)  # mtime doubles as the LRU access time
+        return result
+    except (OSError, ValueError):
+        return None
+
+
+def _pose_cache_put(key: str, result: Dict[str, Any]):
+    if not POSE_CACHE_ENABLED:
+        return
+    global _pose_cache_bytes
+    path = _pose_cache_path(key)
+    tmp_name = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(path), suffix=".tmp", delete=False
+        ) as tmp:
+            tmp_name = tmp.name
+            json.dump(result, tmp)
+        added = os.path.getsize(tmp_name)
+        try:
+            added -= os.path.getsize(path)
+        except OSError:
+            pass
+        os.replace(tmp_name, path)
+    except BaseException as exc:
+        if tmp_name is not None:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+        if isinstance(exc, OSError):
+            return
+        raise
+    with _pose_cache_lock:
+        if _pose_cache_bytes is not None:
+            _pose_cache_bytes += added
+            if _pose_cache_bytes <= POSE_CACHE_MAX_MB * 1024 * 1024:
+                return
+    _pose_cache_evict()
+
+
+def _pose_cache_evict():
+    """Rescan POSE_CACHE_DIR and drop least recently used entries until it fits."""
+    global _pose_cache_bytes
+    max_bytes = POSE_CACHE_MAX_MB * 1024 * 1024
+    stale_before = time.time() - _POSE_CACHE_TMP_MAX_AGE
+    with _pose_cache_lock:
+        entries = []
+        total = 0
+        for root, _, names in os.walk(POSE_CACHE_DIR):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp") and stat.st_mtime < stale_before:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                total += stat.st_size
+                if name.endswith(".json"):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        if total > max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= max_bytes:
+                    break
+        _pose_cache_bytes = total
+
+
+def _cached_pose_result(
+    kind: str,
+    path: str,
+    content_hash: Optional[str],
+    backend: str,
+    sample_fps,
+    max_seconds,
+    compute,
+    model_complexity: Optional[int] = None,
+):
+    content_hash = content_hash or _sha256_file(path)
+    key = _pose_cache_key(content_hash, kind, backend, sample_fps, max_seconds, model_complexity)
+    cached = _pose_cache_get(key)
+    if cached is not None:
+        cached.setdefault("meta", {})["cache_hit"] = True
+        return cached
+    result = compute()
+    _pose_cache_put(key, result)
+    result.setdefault("meta", {})["cache_hit"] = False
+    return result
+
+
+class _FrameSampler:
+    """Iterate (frame_idx, frame) over the frames pose extraction keeps."""
+
+    def __init__(self, cap, sample_fps: float, max_seconds: float, seek: Optional[bool] = None):
+        self.cap = cap
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.stride = max(int(round(self.fps / sample_fps)), 1) if sample_fps > 0 else 1
+        self.max_frames = int(max_seconds * self.fps) if max_seconds and max_seconds > 0 else 0
+        seek = POSE_DECODE_SEEK if seek is None else seek
+        self.seek = seek and self.stride >= POSE_SEEK_MIN_STRIDE
+        self.frames_read = 0
+        self.grabbed = 0
+        self.retrieved = 0
+        self.seeks = 0
+
+    def __iter__(self):
+        frame_idx = 0
+        while not (self.max_frames and frame_idx >= self.max_frames):
+            if not self.cap.grab():
+                break
+            self.grabbed += 1
+            self.frames_read = frame_idx + 1
+            if frame_idx % self.stride != 0:
+                frame_idx += 1
+                continue
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                break
+            self.retrieved += 1
+            yield frame_idx, frame
+            frame_idx += 1
+            if self.seek and self.stride > 1:
+                target = frame_idx - 1 + self.stride
+                if self.max_frames and target >= self.max_frames:
+                    self.frames_read = self.max_frames
+                    break
+                if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                    self.seeks += 1
+                    frame_idx = target
+                else:
+                    self.seek = False
+
+    def stats(self):
+        return {
+            "stride": self.stride,
+            "seek": self.seek,
+            "grabbed": self.grabbed,
+            "retrieved": self.retrieved,
+            "seeks": self.seeks,
+        }
+
+
+class _PosePreprocessor:
+    """Downscale/ROI-crop BGR frames into MediaPipe's RGB input and map landmarks back."""
+
+    def __init__(self, max_side: Optional[int] = None, roi_crop: Optional[bool] = None):
+        self.max_side = POSE_MAX_SIDE if max_side is None else max_side
+        self.roi_crop = POSE_ROI_CROP if roi_crop is None else roi_crop
+        self.roi = None  # (x0, y0, x1, y1), normalized to the full frame
+        self.frame_roi = None
+        self.downscaled = 0
+        self.cropped = 0
+        self.roi_resets = 0
+
+    def __call__(self, frame, out=None):
+        height, width = frame.shape[:2]
+        self.frame_roi = self.roi
+        if self.frame_roi is not None:
+            x0, y0, x1, y1 = self.frame_roi
+            left, top = int(x0 * width), int(y0 * height)
+            right, bottom = int(math.ceil(x1 * width)), int(math.ceil(y1 * height))
+            frame = frame[top:bottom, left:right]
+            # Map back through the pixel-aligned crop, not the requested box.
+            self.frame_roi = (left / width, top / height, right / width, bottom / height)
+            self.cropped += 1
+        longest = max(frame.shape[:2])
+        if self.max_side and longest > self.max_side:
+            scale = self.max_side / longest
+            frame = cv2.resize(
+                frame,
+                (max(int(round(frame.shape[1] * scale)), 1), max(int(round(frame.shape[0] * scale)), 1)),
+                interpolation=cv2.INTER_AREA,
+            )
+            self.downscaled += 1
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+
+    def to_frame(self, landmarks):
+        """(x, y, z, visibility) rows from the last processed image -> full-frame array."""
+        points = np.array(landmarks, dtype=np.float64)
+        if self.frame_roi is not None:
+            x0, y0, x1, y1 = self.frame_roi
+            points[:, 0] = x0 + points[:, 0] * (x1 - x0)
+            points[:, 1] = y0 + points[:, 1] * (y1 - y0)
+            points[:, 2] *= x1 - x0
+        return points
+
+    def update(self, points):
+        if not self.roi_crop:
+            return
+        if points is None:
+            if self.roi is not None:
+                self.roi_resets += 1
+            self.roi = None
+            return
+        visible = points[points[:, 3] >= 0.5, :2]
+        if len(visible) < 4:
+            self.roi = None
+            return
+        (bx0, by0), (bx1, by1) = visible.min(axis=0), visible.max(axis=0)
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset_x = (x1 - x0) * 0.1
+            inset_y = (y1 - y0) * 0.1
+            if bx0 >= x0 + inset_x and bx1 <= x1 - inset_x and by0 >= y0 + inset_y and by1 <= y1 - inset_y:
+                return
+        pad_x = max(bx1 - bx0, 0.05) * POSE_ROI_PADDING
+        pad_y = max(by1 - by0, 0.05) * POSE_ROI_PADDING
+        roi = (max(bx0 - pad_x, 0.0), max(by0 - pad_y, 0.0), min(bx1 + pad_x, 1.0), min(by1 + pad_y, 1.0))
+        # Cropping buys nothing when the body already fills most of the frame.
+        self.roi = roi if (roi[2] - roi[0]) * (roi[3] - roi[1]) < 0.8 else None
+
+    def stats(self):
+        return {
+            "max_side": self.max_side,
+            "roi_crop": self.roi_crop,
+            "downscaled": self.downscaled,
+            "cropped": self.cropped,
+            "roi_resets": self.roi_resets,
+        }
+
+
+class _DecodePipeline:
+    """Decode frames on a background thread; each yielded image is reused after the next one."""
+
+    _END = object()
+
+    def __init__(self, sampler: _FrameSampler, prep: Optional[_PosePreprocessor], depth: Optional[int] = None):
+        self.sampler = sampler
+        self.prep = prep
+        self.depth = max(POSE_PIPELINE_DEPTH if depth is None else depth, 0)
+        self.threaded_prep = prep is not None and not prep.roi_crop
+        self._slots = [None] * self.depth
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self.decode_s = 0.0
+        self.wait_s = 0.0
+        self.infer_s = 0.0
+
+    def __enter__(self):
+        if self.depth:
+            for index in range(self.depth):
+                self._free.put(index)
+            self._thread = threading.Thread(target=self._decode, name="pose-decode", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._free.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _decode(self):
+        try:
+            frames = iter(self.sampler)
+            while True:
+                index = self._free.get()
+                if index is None or self._stop.is_set():
+                    break
+                started = time.perf_counter()
+                item = next(frames, None)
+                if item is None:
+                    break
+                frame_idx, frame = item
+                if self.threaded_prep:
+                    frame = self.prep(frame, out=self._slots[index])
+                self._slots[index] = frame
+                self.decode_s += time.perf_counter() - started
+                self._ready.put((index, frame_idx, frame))
+        except BaseException as exc:  # noqa: BLE001
+            self._ready.put(exc)
+        self._ready.put(self._END)
+
+    def _inline(self):
+        frames = iter(self.sampler)
+        while True:
+            started = time.perf_counter()
+            item = next(frames, None)
+            self.decode_s += time.perf_counter() - started
+            if item is None:
+                return
+            yield item
+
+    def _threaded(self):
+        held = None
+        while True:
+            if held is not None:
+                self._free.put(held)
+            started = time.perf_counter()
+            item = self._ready.get()
+            self.wait_s += time.perf_counter() - started
+            if item is self._END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            held, frame_idx, frame = item
+            yield frame_idx, frame
+
+    def __iter__(self):
+        """Yield (frame_idx, image); images are model-ready RGB when ``prep`` is set."""
+        for frame_idx, frame in self._threaded() if self._thread is not None else self._inline():
+            if self.prep is not None and not (self.threaded_prep and self._thread is not None):
+                frame = self.prep(frame)
+            started = time.perf_counter()
+            yield frame_idx, frame
+            self.infer_s += time.perf_counter() - started
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "threaded_preprocess": self.threaded_prep and self.depth > 0,
+            "decode_ms": int(self.decode_s * 1000),
+            "decode_wait_ms": int(self.wait_s * 1000),
+            "inference_ms": int(self.infer_s * 1000),
+        }
+
 
+def _extract_pose_frames(
+    path: str,
+    backend: str,
+    sample_fps: int,
+    max_seconds: int,
+    content_hash: Optional[str] = None,
+    model_complexity: Optional[int] = None,
+):
     _ensure_pose_backend(backend)
 
-    pose = load_pose() if backend == "mediapipe" else None
-    if backend == "mediapipe" and pose is None:
-        raise HTTPException(status_code=500, detail="Pose model unavailable")
+    return _cached_pose_result(
+        "frames",
+        path,
+        content_hash,
+        backend,
+        sample_fps,
+        max_seconds,
+        lambda: _extract_pose_frames_uncached(path, backend, sample_fps, max_seconds, model_complexity),
+        model_complexity,
+    )
+
+
+_mmpose_pipelines: Dict[str, Any] = {}
+
+
+def _mmpose_pipeline(kind: str, model):
+    """Build (once) the test pipeline that mmdet/mmpose inference helpers rebuild per call."""
+    from mmcv.transforms import Compose
+    from mmengine.registry import init_default_scope
+
+    if kind == "det":
+        init_default_scope(model.cfg.get("default_scope", "mmdet"))
+    else:
+        init_default_scope(model.cfg.get("default_scope", "mmpose"))
+    pipeline = _mmpose_pipelines.get(kind)
+    if pipeline is None:
+        if kind == "det":
+            from mmdet.utils import get_test_pipeline_cfg
+
+            pipeline_cfg = get_test_pipeline_cfg(model.cfg.copy())
+            pipeline_cfg[0].type = "mmdet.LoadImageFromNDArray"
+        else:
+            pipeline_cfg = model.cfg.test_dataloader.dataset.pipeline
+        pipeline = _mmpose_pipelines[kind] = Compose(pipeline_cfg)
+    return pipeline
+
+
+def _mmpose_detect(det_model, images):
+    """Top-1 person box (xyxy) per image from one batched detector pass, or None."""
+    if not images:
+        return []
+    det_pipeline = _mmpose_pipeline("det", det_model)
+    det_inputs = [det_pipeline({"img": image, "img_id": idx}) for idx, image in enumerate(images)]
+    with torch.no_grad():
+        det_results = det_model.test_step(
+            {
+                "inputs": [item["inputs"] for item in det_inputs],
+                "data_samples": [item["data_samples"] for item in det_inputs],
+            }
+        )
+
+    boxes = []
+    for det_result in det_results:
+        pred_instances = getattr(det_result, "pred_instances", None)
+        if pred_instances is None or len(pred_instances) == 0:
+            boxes.append(None)
+            continue
+        scores = pred_instances.scores.detach().cpu().numpy()
+        labels = pred_instances.labels.detach().cpu().numpy()
+        keep = np.flatnonzero((labels == 0) & (scores >= MMPOSE_SCORE_THRESHOLD))
+        if keep.size == 0:
+            boxes.append(None)
+            continue
+        best = keep[np.argmax(scores[keep])]
+        boxes.append(pred_instances.bboxes[best].detach().cpu().numpy().astype(np.float32)[:4])
+    return boxes
+
+
+def _mmpose_topdown(pose_model, images, boxes):
+    """(keypoints, scores) per image from one batched top-down pass; None where unboxed."""
+    from mmengine.dataset import pseudo_collate
+
+    pose_pipeline = _mmpose_pipeline("pose", pose_model)
+    pose_inputs = []
+    owners = []
+    for idx, (image, bbox) in enumerate(zip(images, boxes)):
+        if bbox is None:
+            continue
+        data_info = {"img": image, "bbox": bbox[None], "bbox_score": np.ones(1, dtype=np.float32)}
+        data_info.update(pose_model.dataset_meta)
+        pose_inputs.append(pose_pipeline(data_info))
+        owners.append(idx)
+
+    poses = [None] * len(images)
+    if not pose_inputs:
+        return poses
+    with torch.no_grad():
+        pose_results = pose_model.test_step(pseudo_collate(pose_inputs))
+    for idx, data_sample in zip(owners, pose_results):
+        keypoints = data_sample.pred_instances.keypoints
+        keypoint_scores = data_sample.pred_instances.keypoint_scores
+        if keypoints is not None and len(keypoints) > 0:
+            poses[idx] = (np.asarray(keypoints[0]), np.asarray(keypoint_scores[0]))
+    return poses
+
+
+def _bbox_from_keypoints(keypoints, scores, width: int, height: int):
+    confident = keypoints[scores >= MMPOSE_SCORE_THRESHOLD]
+    if len(confident) < 3:
+        return None
+    (x1, y1), (x2, y2) = confident.min(axis=0), confident.max(axis=0)
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    half_w = max(x2 - x1, 1.0) * MMPOSE_TRACK_PADDING / 2
+    half_h = max(y2 - y1, 1.0) * MMPOSE_TRACK_PADDING / 2
+    return np.array(
+        [max(cx - half_w, 0.0), max(cy - half_h, 0.0), min(cx + half_w, width), min(cy + half_h, height)],
+        dtype=np.float32,
+    )
+
+
+def _mmpose_infer_batch(det_model, pose_model, images, track: Optional[Dict[str, Any]] = None):
+    """COCO17 landmarks per image; tracked frames are boxed from the previous frame's keypoints."""
+    track = track if track is not None else {"frame": 0, "bbox": None, "detected": 0}
+    interval = MMPOSE_DETECT_INTERVAL
+    detect_idx = [
+        idx
+        for idx in range(len(images))
+        if (track["frame"] + idx) % interval == 0 or (idx == 0 and track["bbox"] is None)
+    ]
+    boxes = [None] * len(images)
+    poses = [None] * len(images)
+
+    def redetect(indices):
+        for idx, bbox in zip(indices, _mmpose_detect(det_model, [images[idx] for idx in indices])):
+            boxes[idx] = bbox
+        return len(indices)
 
+    def pose_frames(indices):
+        found = _mmpose_topdown(pose_model, [images[idx] for idx in indices], [boxes[idx] for idx in indices])
+        for idx, pose in zip(indices, found):
+            poses[idx] = pose
+
+    def fit_box(idx):
+        if idx == 0:
+            return track["bbox"]
+        if poses[idx - 1] is None:
+            return None
+        height, width = images[idx].shape[:2]
+        return _bbox_from_keypoints(poses[idx - 1][0], poses[idx - 1][1], width, height)
+
+    detected = set(detect_idx)
+    detections = redetect(detect_idx) if detect_idx else 0
+
+    # Each wave poses the next frame of every chain that starts at a detection,
+    # so a tracked frame is posed only after the frame before it.
+    wave = sorted(detected | {0}) if images else []
+    while wave:
+        tracked = [idx for idx in wave if idx not in detected]
+        for idx in tracked:
+            boxes[idx] = fit_box(idx)
+        unboxed = [idx for idx in tracked if boxes[idx] is None]
+        if unboxed:
+            detections += redetect(unboxed)
+        pose_frames(wave)
+        retry = [
+            idx
+            for idx in tracked
+            if idx not in unboxed and (poses[idx] is None or float(np.mean(poses[idx][1])) < MMPOSE_TRACK_MIN_SCORE)
+        ]
+        if retry:
+            detections += redetect(retry)
+            pose_frames(retry)
+        wave = [idx + 1 for idx in wave if idx + 1 < len(images) and idx + 1 not in detected]
+    track["frame"] += len(images)
+    track["detected"] += detections
+
+    landmarks_per_image = []
+    for image, pose in zip(images, poses):
+        if pose is None:
+            landmarks_per_image.append([])
+            continue
+        height, width = image.shape[:2]
+        keypoints, keypoint_scores = pose
+        landmarks_per_image.append(
+            [
+                {
+                    "name": COCO17_NAMES[j] if j < len(COCO17_NAMES) else f"idx_{j}",
+                    "x": float(point[0]) / width if width else 0.0,
+                    "y": float(point[1]) / height if height else 0.0,
+                    "score": float(score),
+                }
+                for j, (point, score) in enumerate(zip(keypoints, keypoint_scores))
+            ]
+        )
+
+    last_pose = poses[-1] if poses else None
+    if last_pose is None:
+        track["bbox"] = None
+    elif interval > 1:
+        height, width = images[-1].shape[:2]
+        track["bbox"] = _bbox_from_keypoints(last_pose[0], last_pose[1], width, height)
+    return landmarks_per_image
+
+
+def _extract_pose_frames_uncached(
+    path: str, backend: str, sample_fps: int, max_seconds: int, model_complexity: Optional[int] = None
+):
     det_model = None
     pose_model = None
     if backend == "mmpose":
@@ -212,106 +1070,83 @@ def _extract_pose_frames(content: bytes, backend: str, sample_fps: int, max_seco
     warnings = []
     frames = []
     frames_processed = 0
-    frames_with_pose = 0
 
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=True) as tmp:
-        tmp.write(content)
-        tmp.flush()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise HTTPException(status_code=400, detail="Failed to open video file")
 
-        cap = cv2.VideoCapture(tmp.name)
-        if not cap.isOpened():
-            raise HTTPException(status_code=400, detail="Failed to open video file")
+    sampler = _FrameSampler(cap, sample_fps, max_seconds)
+    prep = _PosePreprocessor()
+    fps = sampler.fps
+    pose = None
 
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        stride = max(int(round(fps / sample_fps)), 1) if sample_fps > 0 else 1
-        max_frames = int(max_seconds * fps) if max_seconds and max_seconds > 0 else 0
-        frame_idx = 0
+    def append_frame(frame_idx, landmarks):
+        frames.append(
+            {
+                "t": round(frame_idx / fps, 3) if fps else 0.0,
+                "landmarks": landmarks,
+            }
+        )
 
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                if max_frames and frame_idx >= max_frames:
-                    break
-                if frame_idx % stride != 0:
-                    frame_idx += 1
-                    continue
+    # MMPose frames are buffered and inferred MMPOSE_BATCH_SIZE at a time.
+    pending = []
+
+    track = {"frame": 0, "bbox": None, "detected": 0}
+
+    def flush_pending():
+        batch = _mmpose_infer_batch(det_model, pose_model, [item[1] for item in pending], track)
+        for (pending_idx, _), landmarks in zip(pending, batch):
+            append_frame(pending_idx, landmarks)
+        pending.clear()
+
+    pipeline = _DecodePipeline(sampler, prep if backend == "mediapipe" else None)
+    try:
+        if backend == "mediapipe":
+            pose = load_pose(model_complexity)
+        with pipeline:
+            for frame_idx, frame in pipeline:
                 frames_processed += 1
+                if backend == "mmpose":
+                    pending.append((frame_idx, frame))
+                    if len(pending) >= MMPOSE_BATCH_SIZE:
+                        flush_pending()
+                    continue
+
                 landmarks = []
-                if backend == "mediapipe":
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = pose.process(rgb)
-                    if results.pose_landmarks:
-                        frames_with_pose += 1
-                        for idx, lm in enumerate(results.pose_landmarks.landmark):
-                            name = (
-                                POSE_LANDMARK_NAMES[idx]
-                                if idx < len(POSE_LANDMARK_NAMES)
-                                else f"idx_{idx}"
-                            )
-                            landmarks.append(
-                                {
-                                    "name": name,
-                                    "x": float(lm.x),
-                                    "y": float(lm.y),
-                                    "score": float(getattr(lm, "visibility", 0.0)),
-                                }
-                            )
+                results = pose.process(frame)
+                if results.pose_landmarks:
+                    points = prep.to_frame(
+                        [
+                            (lm.x, lm.y, lm.z, getattr(lm, "visibility", 0.0))
+                            for lm in results.pose_landmarks.landmark
+                        ]
+                    )
+                    prep.update(points)
+                    for idx, (x_val, y_val, _, score) in enumerate(points.tolist()):
+                        name = (
+                            POSE_LANDMARK_NAMES[idx]
+                            if idx < len(POSE_LANDMARK_NAMES)
+                            else f"idx_{idx}"
+                        )
+                        landmarks.append(
+                            {
+                                "name": name,
+                                "x": x_val,
+                                "y": y_val,
+                                "score": score,
+                            }
+                        )
                 else:
-                    from mmdet.apis import inference_detector
-                    from mmpose.apis import inference_topdown
-                    from mmpose.structures import merge_data_samples
-
-                    det_result = inference_detector(det_model, frame)
-                    pred_instances = getattr(det_result, "pred_instances", None)
-                    bboxes = []
-                    if pred_instances is not None and len(pred_instances) > 0:
-                        bboxes_raw = pred_instances.bboxes.detach().cpu().numpy()
-                        scores_raw = pred_instances.scores.detach().cpu().numpy()
-                        labels_raw = pred_instances.labels.detach().cpu().numpy()
-                        for bbox, score, label in zip(bboxes_raw, scores_raw, labels_raw):
-                            if int(label) != 0 or score < MMPOSE_SCORE_THRESHOLD:
-                                continue
-                            bboxes.append([*bbox.tolist(), float(score)])
-                    if bboxes:
-                        bboxes = sorted(bboxes, key=lambda x: x[4], reverse=True)[:1]
-                        pose_results = inference_topdown(pose_model, frame, bboxes)
-                        if pose_results:
-                            data_sample = merge_data_samples(pose_results)
-                            keypoints = data_sample.pred_instances.keypoints
-                            keypoint_scores = data_sample.pred_instances.keypoint_scores
-                            if keypoints is not None and len(keypoints) > 0:
-                                frames_with_pose += 1
-                                height, width = frame.shape[:2]
-                                for idx, (point, score) in enumerate(
-                                    zip(keypoints[0], keypoint_scores[0])
-                                ):
-                                    name = (
-                                        COCO17_NAMES[idx]
-                                        if idx < len(COCO17_NAMES)
-                                        else f"idx_{idx}"
-                                    )
-                                    x_val = float(point[0]) / width if width else 0.0
-                                    y_val = float(point[1]) / height if height else 0.0
-                                    landmarks.append(
-                                        {
-                                            "name": name,
-                                            "x": x_val,
-                                            "y": y_val,
-                                            "score": float(score),
-                                        }
-                                    )
-                frames.append(
-                    {
-                        "t": round(frame_idx / fps, 3) if fps else 0.0,
-                        "landmarks": landmarks,
-                    }
-                )
-                frame_idx += 1
-        finally:
-            cap.release()
-
+                    prep.update(None)
+                append_frame(frame_idx, landmarks)
+        if pending:
+            flush_pending()
+    finally:
+        cap.release()
+        if pose is not None:
+            _release_pose(pose, model_complexity)
+
+    frames_with_pose = sum(1 for frame in frames if frame["landmarks"])
     if backend == "mmpose":
         warnings.append("coco17")
     if frames_processed == 0:
@@ -323,107 +1158,96 @@ def _extract_pose_frames(content: bytes, backend: str, sample_fps: int, max_seco
     pose_success_rate = (
         round(frames_with_pose / frames_processed, 4) if frames_processed else 0.0
     )
+    meta = {
+        "backend": backend,
+        "sample_fps": sample_fps,
+        "max_seconds": max_seconds,
+        "frames": frames_processed,
+        "pose_success_rate": pose_success_rate,
+        "warnings": warnings,
+        "decode": sampler.stats(),
+        "pipeline": pipeline.stats(),
+    }
+    if backend == "mediapipe":
+        meta["preprocess"] = prep.stats()
+        meta["model_complexity"] = _pose_complexity(model_complexity)
+    if backend == "mmpose":
+        meta["detector_frames"] = track["detected"]
     return {
-        "meta": {
-            "backend": backend,
-            "sample_fps": sample_fps,
-            "max_seconds": max_seconds,
-            "frames": frames_processed,
-            "pose_success_rate": pose_success_rate,
-            "warnings": warnings,
-        },
+        "meta": meta,
         "frames": frames,
         "vectors": vectors,
     }
 
 
-def _normalize_points(landmarks, rotate: bool):
-    if len(landmarks) < 25:
+def _normalize_points(points, rotate: bool):
+    """Hip-centre, shoulder-scale and optionally de-rotate (..., landmarks, 3) points."""
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[-2] < 25:
         return None
-    lhip, rhip = landmarks[23], landmarks[24]
-    lsho, rsho = landmarks[11], landmarks[12]
-    center_x = (lhip.x + rhip.x) / 2
-    center_y = (lhip.y + rhip.y) / 2
-    center_z = (lhip.z + rhip.z) / 2
-    shoulder_dist = math.hypot(lsho.x - rsho.x, lsho.y - rsho.y)
-    scale = max(shoulder_dist, 1e-6)
-    points = []
-    for lm in landmarks:
-        points.append(
-            [
-                (lm.x - center_x) / scale,
-                (lm.y - center_y) / scale,
-                (lm.z - center_z) / scale,
-            ]
-        )
+    center = (points[..., 23, :] + points[..., 24, :]) / 2
+    shoulders = points[..., 11, :2] - points[..., 12, :2]
+    scale = np.maximum(np.hypot(shoulders[..., 0], shoulders[..., 1]), 1e-6)
+    normalized = (points - center[..., None, :]) / scale[..., None, None]
     if rotate:
-        lsho_p, rsho_p = points[11], points[12]
-        angle = math.atan2(lsho_p[1] - rsho_p[1], lsho_p[0] - rsho_p[0])
-        cos_val = math.cos(-angle)
-        sin_val = math.sin(-angle)
-        for p in points:
-            x, y = p[0], p[1]
-            p[0] = x * cos_val - y * sin_val
-            p[1] = x * sin_val + y * cos_val
-    return points
+        angle = np.arctan2(shoulders[..., 1], shoulders[..., 0])[..., None]
+        cos_val = np.cos(-angle)
+        sin_val = np.sin(-angle)
+        x = normalized[..., 0].copy()
+        y = normalized[..., 1]
+        normalized[..., 0] = x * cos_val - y * sin_val
+        normalized[..., 1] = x * sin_val + y * cos_val
+    return normalized
 
 
 def _normalize_landmarks(landmarks):
-    points = _normalize_points(landmarks, CHOREO_NORMALIZE_ROTATE)
-    if not points:
+    points = _normalize_points([[lm.x, lm.y, lm.z] for lm in landmarks], CHOREO_NORMALIZE_ROTATE)
+    if points is None:
         return None
-    vec = []
-    for x, y, z in points:
-        vec.extend([x, y, z])
-    return vec
+    return points.reshape(-1).tolist()
 
 
 def _angle(a, b, c):
-    ab = (a[0] - b[0], a[1] - b[1])
-    cb = (c[0] - b[0], c[1] - b[1])
-    dot = ab[0] * cb[0] + ab[1] * cb[1]
-    norm_ab = math.hypot(ab[0], ab[1])
-    norm_cb = math.hypot(cb[0], cb[1])
-    if norm_ab == 0 or norm_cb == 0:
-        return None
-    cos_val = max(-1.0, min(1.0, dot / (norm_ab * norm_cb)))
-    return math.acos(cos_val)
+    """Angle at ``b`` for (..., 2) point arrays; NaN where a segment has zero length."""
+    ab = a - b
+    cb = c - b
+    norm = np.hypot(ab[..., 0], ab[..., 1]) * np.hypot(cb[..., 0], cb[..., 1])
+    dot = ab[..., 0] * cb[..., 0] + ab[..., 1] * cb[..., 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angle = np.arccos(np.clip(dot / norm, -1.0, 1.0))
+    return np.where(norm == 0, np.nan, angle)
 
 
 def _torso_angle(points):
-    lsho, rsho = points[11], points[12]
-    lhip, rhip = points[23], points[24]
-    shoulder_center = ((lsho[0] + rsho[0]) / 2, (lsho[1] + rsho[1]) / 2)
-    hip_center = ((lhip[0] + rhip[0]) / 2, (lhip[1] + rhip[1]) / 2)
-    vec = (shoulder_center[0] - hip_center[0], shoulder_center[1] - hip_center[1])
-    norm = math.hypot(vec[0], vec[1])
-    if norm == 0:
-        return None
-    vertical = (0.0, -1.0)
-    cos_val = max(-1.0, min(1.0, (vec[0] * vertical[0] + vec[1] * vertical[1]) / norm))
-    return math.acos(cos_val)
+    shoulder_center = (points[..., 11, :2] + points[..., 12, :2]) / 2
+    hip_center = (points[..., 23, :2] + points[..., 24, :2]) / 2
+    vec = shoulder_center - hip_center
+    norm = np.hypot(vec[..., 0], vec[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angle = np.arccos(np.clip(-vec[..., 1] / norm, -1.0, 1.0))
+    return np.where(norm == 0, np.nan, angle)
 
 
-def _angles_from_points(points, vis):
-    xy = [(p[0], p[1]) for p in points]
-    angles = []
-    joints = [
+_ANGLE_JOINTS = np.array(
+    [
         (11, 13, 15),  # left elbow
         (12, 14, 16),  # right elbow
         (23, 25, 27),  # left knee
         (24, 26, 28),  # right knee
     ]
-    for a, b, c in joints:
-        angle = _angle(xy[a], xy[b], xy[c])
-        if angle is None:
-            return None
-        weight = min(vis[a], vis[b], vis[c])
-        angles.append(angle * weight)
-    torso = _torso_angle(points)
-    if torso is None:
-        return None
-    torso_vis = min(vis[11], vis[12], vis[23], vis[24])
-    angles.append(torso * torso_vis)
+)
+_TORSO_JOINTS = [11, 12, 23, 24]
+
+
+def _angles_from_points(points, vis):
+    """Visibility-weighted joint and torso angles, shape (..., 5); NaN where undefined."""
+    xy = points[..., :2]
+    joint_xy = xy[..., _ANGLE_JOINTS, :]
+    joint_angles = _angle(joint_xy[..., 0, :], joint_xy[..., 1, :], joint_xy[..., 2, :])
+    joint_vis = vis[..., _ANGLE_JOINTS].min(axis=-1)
+    torso = _torso_angle(points) * vis[..., _TORSO_JOINTS].min(axis=-1)
+    angles = np.concatenate([joint_angles * joint_vis, torso[..., None]], axis=-1)
+    angles[np.isnan(angles).any(axis=-1)] = np.nan
     return angles
 
 
@@ -444,26 +1268,25 @@ def _pool_vectors(vectors):
     return [s / count for s in sums]
 
 
+def _pooled_similarity(vectors_a, vectors_b):
+    vec_a = _pool_vectors(vectors_a)
+    vec_b = _pool_vectors(vectors_b)
+    return _cosine_similarity(vec_a, vec_b) if vec_a and vec_b else 0.0
+
+
 def _smooth_series(series, window):
-    if not series:
-        return []
-    size = max(int(window), 1)
-    radius = size // 2
-    dim = len(series[0])
-    output = []
-    for idx in range(len(series)):
-        start = max(0, idx - radius)
-        end = min(len(series), idx + radius + 1)
-        count = end - start
-        sums = [0.0] * dim
-        for j in range(start, end):
-            vec = series[j]
-            if len(vec) != dim:
-                continue
-            for k, val in enumerate(vec):
-                sums[k] += val
-        output.append([s / count for s in sums])
-    return output
+    """Centred moving average over rows, truncated at the edges, via cumulative sums."""
+    series = np.asarray(series, dtype=np.float64)
+    if series.shape[0] == 0:
+        return series.reshape(0, series.shape[1] if series.ndim == 2 else 0)
+    radius = max(int(window), 1) // 2
+    length = series.shape[0]
+    sums = np.zeros((length + 1,) + series.shape[1:])
+    np.cumsum(series, axis=0, out=sums[1:])
+    idx = np.arange(length)
+    start = np.maximum(idx - radius, 0)
+    end = np.minimum(idx + radius + 1, length)
+    return (sums[end] - sums[start]) / (end - start)[:, None]
 
 
 def _smooth_scalar_series(values, window):
@@ -481,21 +1304,12 @@ def _smooth_scalar_series(values, window):
 
 
 def _trim_by_motion(energies, threshold):
-    if not energies:
+    active = np.flatnonzero(np.asarray(energies, dtype=np.float64) >= threshold)
+    if len(energies) == 0:
         return 0, -1
-    start = None
-    end = None
-    for idx, value in enumerate(energies):
-        if value >= threshold:
-            start = idx
-            break
-    for idx in range(len(energies) - 1, -1, -1):
-        if energies[idx] >= threshold:
-            end = idx
-            break
-    if start is None or end is None or end < start:
+    if active.size == 0:
         return 0, len(energies) - 1
-    return start, end
+    return int(active[0]), int(active[-1])
 
 
 def _mean_std(values):
@@ -583,83 +1397,169 @@ COCO17_NAMES = [
 ]
 
 
-def _process_pose_bytes(file_bytes: bytes, sample_fps: float, max_seconds: float):
-    pose = load_pose()
-    if pose is None:
-        raise HTTPException(status_code=500, detail="Pose model unavailable")
+def _process_pose_file(
+    path: str,
+    sample_fps: float,
+    max_seconds: float,
+    content_hash: Optional[str] = None,
+    model_complexity: Optional[int] = None,
+):
+    return _cached_pose_result(
+        "features",
+        path,
+        content_hash,
+        "mediapipe",
+        sample_fps,
+        max_seconds,
+        lambda: _process_pose_file_uncached(path, sample_fps, max_seconds, model_complexity),
+        model_complexity,
+    )
 
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=True) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
 
-        cap = cv2.VideoCapture(tmp.name)
-        if not cap.isOpened():
-            raise HTTPException(status_code=400, detail="Failed to open video file")
+def _pose_worker_task(
+    path: str, sample_fps: float, max_seconds: float, content_hash: str, model_complexity: Optional[int] = None
+):
+    # HTTPException does not survive pickling, so hand it back as plain data.
+    try:
+        return {"result": _process_pose_file(path, sample_fps, max_seconds, content_hash, model_complexity)}
+    except HTTPException as exc:
+        return {"status_code": exc.status_code, "detail": exc.detail}
 
-        started = time.time()
-        try:
-            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-            stride = max(int(round(fps / sample_fps)), 1) if sample_fps > 0 else 1
-            max_frames = int(max_seconds * fps) if max_seconds and max_seconds > 0 else 0
 
-            frame_idx = 0
-            frames_processed = 0
-            frames_with_pose = 0
-            pose_frames = []
-            vectors = []
-            angle_series = []
+async def _process_pose_file_async(
+    path: str,
+    sample_fps: float,
+    max_seconds: float,
+    content_hash: Optional[str] = None,
+    model_complexity: Optional[int] = None,
+):
+    global _pose_pool
+    pool = load_pose_pool()
+    if pool is None:
+        return await _run_blocking(
+            "pose", _process_pose_file, path, sample_fps, max_seconds, content_hash, model_complexity
+        )
+
+    content_hash = content_hash or await _run_blocking("media", _sha256_file, path)
+    cached = _pose_cache_get(
+        _pose_cache_key(content_hash, "features", "mediapipe", sample_fps, max_seconds, model_complexity)
+    )
+    if cached is not None:
+        cached.setdefault("meta", {})["cache_hit"] = True
+        return cached
+
+    try:
+        outcome = await asyncio.wrap_future(
+            pool.submit(_pose_worker_task, path, sample_fps, max_seconds, content_hash, model_complexity)
+        )
+    except BrokenProcessPool as exc:
+        _pose_pool = None
+        raise HTTPException(status_code=500, detail="Pose worker crashed") from exc
+    if "result" not in outcome:
+        raise HTTPException(status_code=outcome["status_code"], detail=outcome["detail"])
+    return outcome["result"]
+
+
+async def _process_pose_pair(
+    path_a: str,
+    path_b: str,
+    sample_fps: float,
+    max_seconds: float,
+    hash_a: Optional[str] = None,
+    hash_b: Optional[str] = None,
+    return_exceptions: bool = False,
+    model_complexity: Optional[int] = None,
+):
+    return await asyncio.gather(
+        _process_pose_file_async(path_a, sample_fps, max_seconds, hash_a, model_complexity),
+        _process_pose_file_async(path_b, sample_fps, max_seconds, hash_b, model_complexity),
+        return_exceptions=return_exceptions,
+    )
 
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                if max_frames and frame_idx >= max_frames:
-                    break
-                if frame_idx % stride != 0:
-                    frame_idx += 1
-                    continue
 
+def _process_pose_file_uncached(
+    path: str, sample_fps: float, max_seconds: float, model_complexity: Optional[int] = None
+):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise HTTPException(status_code=400, detail="Failed to open video file")
+
+    started = time.time()
+    pose = None
+    try:
+        pose = load_pose(model_complexity)
+        sampler = _FrameSampler(cap, sample_fps, max_seconds)
+        prep = _PosePreprocessor()
+        fps = sampler.fps
+        frame_budget = sampler.max_frames or int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        capacity = max(math.ceil(frame_budget / sampler.stride), 1)
+
+        frames_processed = 0
+        frames_with_pose = 0
+        # x, y, z, visibility per landmark for every frame with a detected pose.
+        landmarks = np.empty((capacity, len(POSE_LANDMARK_NAMES), 4), dtype=np.float32)
+        times = np.empty(capacity)
+
+        pipeline = _DecodePipeline(sampler, prep)
+        with pipeline:
+            for frame_idx, image in pipeline:
                 frames_processed += 1
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = pose.process(rgb)
-                if results.pose_landmarks:
-                    frames_with_pose += 1
-                    landmarks = [
-                        {
-                            "x": float(lm.x),
-                            "y": float(lm.y),
-                            "z": float(lm.z),
-                            "v": float(lm.visibility),
-                        }
-                        for lm in results.pose_landmarks.landmark
-                    ]
-                    pose_frames.append({"t": round(frame_idx / fps, 3), "landmarks": landmarks})
-                    normalized_points = _normalize_points(
-                        results.pose_landmarks.landmark,
-                        CHOREO_NORMALIZE_ROTATE,
-                    )
-                    if normalized_points:
-                        vec = []
-                        for x, y, z in normalized_points:
-                            vec.extend([x, y, z])
-                        vectors.append(vec)
-                        vis = [float(getattr(lm, "visibility", 0.0)) for lm in results.pose_landmarks.landmark]
-                        angles = _angles_from_points(normalized_points, vis)
-                        if angles:
-                            angle_series.append(angles)
+                results = pose.process(image)
+                if not results.pose_landmarks:
+                    prep.update(None)
+                    continue
+                if frames_with_pose == landmarks.shape[0]:
+                    landmarks = np.concatenate([landmarks, np.empty_like(landmarks)])
+                    times = np.concatenate([times, np.empty_like(times)])
+                points = prep.to_frame(
+                    [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark]
+                )
+                prep.update(points)
+                landmarks[frames_with_pose] = points
+                times[frames_with_pose] = frame_idx / fps
+                frames_with_pose += 1
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
+    finally:
+        cap.release()
+        if pose is not None:
+            _release_pose(pose, model_complexity)
+
+    features_started = time.perf_counter()
+    landmarks = landmarks[:frames_with_pose]
+    normalized = _normalize_points(landmarks[..., :3], CHOREO_NORMALIZE_ROTATE)
+    vis = landmarks[..., 3].astype(np.float64)
+    vectors = normalized.reshape(frames_with_pose, normalized.shape[1] * 3)
+    angle_series = _angles_from_points(normalized, vis)
+    angle_valid = ~np.isnan(angle_series).any(axis=1)
+    angle_series = angle_series[angle_valid]
 
-                frame_idx += 1
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
-        finally:
-            cap.release()
+    smoothed_angles = _smooth_series(angle_series, CHOREO_SMOOTH_WINDOW)
+    raw_d_angles = np.zeros_like(smoothed_angles)
+    raw_d_angles[1:] = np.diff(smoothed_angles, axis=0)
+    smoothed_d_angles = _smooth_series(raw_d_angles, CHOREO_SMOOTH_WINDOW)
+    motion_energy = np.abs(smoothed_d_angles).sum(axis=1)
+    trim_start, trim_end = _trim_by_motion(motion_energy, CHOREO_TRIM_ENERGY)
+    if trim_end < trim_start:
+        trim_start, trim_end = 0, len(smoothed_angles) - 1
+    window = slice(trim_start, trim_end + 1)
+    features = np.concatenate(
+        [smoothed_angles[window], smoothed_d_angles[window] * CHOREO_DANGLE_WEIGHT], axis=1
+    )
+    stages = {**pipeline.stats(), "features_ms": int((time.perf_counter() - features_started) * 1000)}
 
     duration_ms = int((time.time() - started) * 1000)
-    truncated = len(pose_frames) > 50
-    pose_frames_light = pose_frames[:50]
-    all_vis = [lm.get("v", 0.0) for frame in pose_frames_light for lm in frame.get("landmarks", [])]
-    avg_vis = sum(all_vis) / len(all_vis) if all_vis else None
-    seconds_used = round((min(frame_idx, max_frames) if max_frames else frame_idx) / fps, 3) if fps else None
+    truncated = frames_with_pose > 50
+    light = landmarks[:50].astype(np.float64)
+    pose_frames_light = [
+        {
+            "t": round(float(t), 3),
+            "landmarks": [{"x": x, "y": y, "z": z, "v": v} for x, y, z, v in frame.tolist()],
+        }
+        for t, frame in zip(times[:50], light)
+    ]
+    avg_vis = float(light[..., 3].mean()) if light.size else None
+    seconds_used = round(sampler.frames_read / fps, 3) if fps else None
 
     summary = {
         "frames_processed": frames_processed,
@@ -667,45 +1567,24 @@ def _process_pose_bytes(file_bytes: bytes, sample_fps: float, max_seconds: float
         "frames_with_pose_ratio": round(frames_with_pose / frames_processed, 4) if frames_processed else 0.0,
         "returned_frames": len(pose_frames_light),
     }
-    smoothed_angles = _smooth_series(angle_series, CHOREO_SMOOTH_WINDOW)
-    raw_d_angles = []
-    for idx, angles in enumerate(smoothed_angles):
-        if idx == 0:
-            raw_d_angles.append([0.0 for _ in angles])
-            continue
-        raw_d_angles.append([a - b for a, b in zip(angles, smoothed_angles[idx - 1])])
-    smoothed_d_angles = _smooth_series(raw_d_angles, CHOREO_SMOOTH_WINDOW)
-    motion_energy = [sum(abs(val) for val in frame) for frame in smoothed_d_angles]
-    trim_start, trim_end = _trim_by_motion(motion_energy, CHOREO_TRIM_ENERGY)
-    if trim_end < trim_start:
-        trim_start, trim_end = 0, len(smoothed_angles) - 1
-    trimmed_d_angles = (
-        smoothed_d_angles[trim_start:trim_end + 1] if smoothed_d_angles else []
-    )
-    trimmed_motion = (
-        motion_energy[trim_start:trim_end + 1] if motion_energy else []
-    )
-    features = []
-    for idx in range(trim_start, trim_end + 1):
-        angles = smoothed_angles[idx]
-        d_angles = smoothed_d_angles[idx] if idx < len(smoothed_d_angles) else [0.0 for _ in angles]
-        weighted_d_angles = [val * CHOREO_DANGLE_WEIGHT for val in d_angles]
-        features.append(angles + weighted_d_angles)
-
     feature_stats = {"avg_visibility": round(avg_vis, 4) if avg_vis is not None else None}
     meta = {
         "fps": round(fps, 3),
         "sample_fps": sample_fps,
         "max_seconds": max_seconds,
         "processing_ms": duration_ms,
-        "pose_frames_total": len(pose_frames),
+        "pose_frames_total": frames_with_pose,
         "pose_frames_returned": len(pose_frames_light),
         "truncated": truncated,
         "seconds_used": seconds_used,
+        "decode": sampler.stats(),
+        "preprocess": prep.stats(),
+        "pipeline": stages,
+        "model_complexity": _pose_complexity(model_complexity),
     }
     trim_meta = {
-        "start_frame": trim_start if smoothed_angles else None,
-        "end_frame": trim_end if smoothed_angles else None,
+        "start_frame": trim_start if len(smoothed_angles) else None,
+        "end_frame": trim_end if len(smoothed_angles) else None,
     }
 
     return {
@@ -713,11 +1592,13 @@ def _process_pose_bytes(file_bytes: bytes, sample_fps: float, max_seconds: float
         "meta": meta,
         "summary": summary,
         "feature_stats": feature_stats,
-        "vectors": vectors,
-        "features": features,
+        "vectors": vectors.tolist(),
+        "features": features.tolist(),
         "trim": trim_meta,
-        "d_angles": trimmed_d_angles,
-        "motion_energy": trimmed_motion,
+        "d_angles": smoothed_d_angles[window].tolist(),
+        "motion_energy": motion_energy[window].tolist(),
+        # Video time of each features row: frames without a pose or angles and the trim are skipped.
+        "feature_times": np.round(times[:frames_with_pose][angle_valid][window], 3).tolist(),
         "seconds_used": seconds_used,
         "processing_ms": duration_ms,
     }
@@ -738,9 +1619,7 @@ def _has_invalid_vectors(vectors):
     return False
 
 
-def _feature_distance(vec_a, vec_b, weights):
-    if len(vec_a) != len(vec_b):
-        return float("inf")
+def _feature_weights(weights, dim: int):
     arms = weights.get("arms", 1.0)
     legs = weights.get("legs", 1.0)
     torso = weights.get("torso", 1.0)
@@ -756,12 +1635,10 @@ def _feature_distance(vec_a, vec_b, weights):
         legs,
         torso,
     ]
-    total = 0.0
-    for idx, (a, b) in enumerate(zip(vec_a, vec_b)):
-        w = weight_map[idx] if idx < len(weight_map) else 1.0
-        diff = (a - b) * w
-        total += diff * diff
-    return math.sqrt(total)
+    out = np.ones(dim, dtype=np.float64)
+    head = min(dim, len(weight_map))
+    out[:head] = weight_map[:head]
+    return out
 
 
 def _build_io_meta(storage_path: Optional[str], sha256: str, pose_result: Optional[Dict[str, Any]]):
@@ -777,30 +1654,450 @@ def _build_io_meta(storage_path: Optional[str], sha256: str, pose_result: Option
     }
 
 
-def _dtw_cost(seq_a, seq_b, band: int, dist_fn=None):
-    len_a, len_b = len(seq_a), len(seq_b)
-    if len_a == 0 or len_b == 0:
-        return float("inf")
-    band = max(band, abs(len_a - len_b))
-    inf = float("inf")
-    prev = [inf] * (len_b + 1)
-    curr = [inf] * (len_b + 1)
-    prev[0] = 0.0
+def _as_sequence_array(seq):
+    """Frames as a (len, dim) float array; ragged frames are zero-padded to the widest."""
+    if not _uniform_width(seq):
+        rows = [np.asarray(row, dtype=np.float64).ravel() for row in seq]
+        arr = np.zeros((len(rows), max(len(row) for row in rows)))
+        for index, row in enumerate(rows):
+            arr[index, : len(row)] = row
+        return arr
+    arr = np.asarray(seq, dtype=np.float64)
+    if arr.ndim == 1:
+        arr = arr.reshape(len(arr), -1) if arr.size else arr.reshape(0, 0)
+    return arr
 
-    for i in range(1, len_a + 1):
-        curr[0] = inf
-        start = max(1, i - band)
-        end = min(len_b, i + band)
-        for j in range(start, end + 1):
-            if dist_fn:
-                dist = dist_fn(seq_a[i - 1], seq_b[j - 1])
-            else:
-                dist = 1 - _cosine_similarity(seq_a[i - 1], seq_b[j - 1])
-            best = min(prev[j], curr[j - 1], prev[j - 1])
-            curr[j] = dist + best
-        prev, curr = curr, [inf] * (len_b + 1)
 
-    return prev[len_b]
+def _uniform_width(seq) -> bool:
+    if isinstance(seq, np.ndarray):
+        return True
+    return len({np.size(row) for row in seq}) <= 1
+
+
+def _mixed_feature_lengths(metric: str, *seqs) -> bool:
+    """True when the feature metric would compare vectors of different lengths (cost inf)."""
+    return metric == "feature" and not all(_uniform_width(seq) for seq in seqs)
+
+
+def _pose_array(pose_result, key: str):
+    value = pose_result.get(key) if pose_result else None
+    return _as_sequence_array(value if value is not None else [])
+
+
+def _dtw_band_distances(arr_a, arr_b, band: int, metric: str = "cosine", weights=None):
+    """Local costs inside the band as a (len_a, 2 * band + 1) matrix; cells outside seq_b are inf."""
+    len_a, len_b = len(arr_a), len(arr_b)
+    width = 2 * band + 1
+    cols = np.arange(len_a)[:, None] - band + np.arange(width)[None, :]
+    valid = (cols >= 0) & (cols < len_b)
+    cols = np.clip(cols, 0, len_b - 1)
+    dist = np.full((len_a, width), np.inf)
+
+    if metric == "feature":
+        if arr_a.shape[1] != arr_b.shape[1]:
+            return dist
+        w = _feature_weights(weights or {}, arr_a.shape[1])
+        arr_a = arr_a * w
+        arr_b = arr_b * w
+    else:
+        # Mirrors _cosine_similarity: dot over the shared prefix, norms over full vectors.
+        dim = min(arr_a.shape[1], arr_b.shape[1])
+        norm_a = np.sqrt(np.einsum("id,id->i", arr_a, arr_a))
+        norm_b = np.sqrt(np.einsum("jd,jd->j", arr_b, arr_b))
+        arr_a = arr_a[:, :dim]
+        arr_b = arr_b[:, :dim]
+
+    # Gather the band in row blocks so a wide band on 99-dim vectors stays a few MB.
+    block = max(1, DTW_GATHER_BUDGET // max(width * arr_a.shape[1], 1))
+    for start in range(0, len_a, block):
+        stop = min(len_a, start + block)
+        gathered = arr_b[cols[start:stop]]
+        if metric == "feature":
+            diff = arr_a[start:stop, None, :] - gathered
+            dist[start:stop] = np.sqrt(np.einsum("ikd,ikd->ik", diff, diff))
+        else:
+            dot = np.einsum("id,ikd->ik", arr_a[start:stop], gathered)
+            denom = norm_a[start:stop, None] * norm_b[cols[start:stop]]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                dist[start:stop] = 1 - np.where(denom > 0, dot / denom, 0.0)
+
+    dist[~valid] = np.inf
+    return dist
+
+
+# Backpointer codes stored by _dtw_sweep_row when asked for moves.
+_DTW_DIAG, _DTW_UP, _DTW_LEFT = 0, 1, 2
+
+
+def _dtw_sweep_row(prev, curr, row, lo: int, hi: int, moves=None):
+    """Fill one DTW row from the previous row's costs, optionally recording int8 moves."""
+    diag = prev[lo : hi + 1]
+    up = prev[lo + 1 : hi + 2]
+    step = row + np.minimum(up, diag)
+    run = np.cumsum(row)
+    lead = np.minimum.accumulate(step - run)
+    curr[lo + 1 : hi + 2] = run + lead
+    if moves is not None:
+        moves[:] = np.where(lead < step - run, _DTW_LEFT, np.where(up < diag, _DTW_UP, _DTW_DIAG))
+
+
+def _dtw_accumulate(
+    dist, band: int, len_b: int, abandon_above: float = math.inf, remaining=None, moves=None
+):
+    """Banded DTW recurrence over a _dtw_band_distances matrix, with optional early abandon."""
+    len_a = dist.shape[0]
+    prev = np.full(len_b + 1, np.inf)
+    curr = np.full(len_b + 1, np.inf)
+    prev[0] = 0.0
+    for i in range(len_a):
+        lo = max(0, i - band)
+        hi = min(len_b - 1, i + band)
+        curr.fill(np.inf)
+        if hi >= lo:
+            cells = slice(lo - i + band, hi - i + band + 1)
+            _dtw_sweep_row(prev, curr, dist[i, cells], lo, hi, None if moves is None else moves[i, cells])
+        if abandon_above < math.inf:
+            rest = remaining[i] if remaining is not None else 0.0
+            if curr.min() + rest > abandon_above:
+                return math.inf
+        prev, curr = curr, prev
+    return float(prev[len_b])
+
+
+def _dtw_band(band: int, len_a: int, len_b: int) -> int:
+    return min(max(band, abs(len_a - len_b), 0), max(len_a, len_b))
+
+
+def _dtw_cost(seq_a, seq_b, band: int, metric: str = "cosine", weights=None):
+    len_a, len_b = len(seq_a), len(seq_b)
+    if len_a == 0 or len_b == 0 or _mixed_feature_lengths(metric, seq_a, seq_b):
+        return float("inf")
+    band = _dtw_band(band, len_a, len_b)
+    arr_a = _as_sequence_array(seq_a)
+    arr_b = _as_sequence_array(seq_b)
+    dist = _dtw_band_distances(arr_a, arr_b, band, metric, weights)
+    if not np.isfinite(dist).any():
+        return float("inf")
+    return _dtw_accumulate(dist, band, len_b)
+
+
+def _dtw_backtrack(moves, band: int, len_b: int):
+    """Warping path from (0, 0) to the last cell, following banded backpointers."""
+    i, j = moves.shape[0] - 1, len_b - 1
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        move = moves[i, j - i + band]
+        if move == _DTW_DIAG:
+            i, j = i - 1, j - 1
+        elif move == _DTW_UP:
+            i -= 1
+        else:
+            j -= 1
+        path.append((i, j))
+    path.reverse()
+    return path
+
+
+def _dtw_path(seq_a, seq_b, band: int, metric: str = "cosine", weights=None):
+    """Banded DTW returning (cost, path, step costs); the path is empty when cost is inf."""
+    len_a, len_b = len(seq_a), len(seq_b)
+    if len_a == 0 or len_b == 0 or _mixed_feature_lengths(metric, seq_a, seq_b):
+        return float("inf"), [], []
+    band = _dtw_band(band, len_a, len_b)
+    arr_a = _as_sequence_array(seq_a)
+    arr_b = _as_sequence_array(seq_b)
+    dist = _dtw_band_distances(arr_a, arr_b, band, metric, weights)
+    moves = np.zeros(dist.shape, dtype=np.int8)
+    cost = _dtw_accumulate(dist, band, len_b, moves=moves)
+    if not math.isfinite(cost):
+        return cost, [], []
+    path = _dtw_backtrack(moves, band, len_b)
+    steps = [float(dist[i, j - i + band]) for i, j in path]
+    return cost, path, steps
+
+
+# Lower bounds are compared with this much slack so rounding can never prune a
+# candidate that brute force would have kept.
+_DTW_LB_SLACK = 1e-9
+
+
+def _dtw_lb_kim(arr_a, arr_b, metric: str, weights=None):
+    """LB_Kim: the first and last cells lie on every warping path."""
+    ends_a = arr_a[[0, -1]]
+    ends_b = arr_b[[0, -1]]
+    if metric == "feature":
+        if arr_a.shape[1] != arr_b.shape[1]:
+            return math.inf
+        diff = (ends_a - ends_b) * _feature_weights(weights or {}, arr_a.shape[1])
+        costs = np.sqrt(np.einsum("id,id->i", diff, diff))
+    else:
+        dim = min(arr_a.shape[1], arr_b.shape[1])
+        dot = np.einsum("id,id->i", ends_a[:, :dim], ends_b[:, :dim])
+        denom = np.linalg.norm(ends_a, axis=1) * np.linalg.norm(ends_b, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            costs = 1 - np.where(denom > 0, dot / denom, 0.0)
+    if len(arr_a) == 1 and len(arr_b) == 1:
+        return float(costs[0])
+    return float(costs.sum())
+
+
+def _dtw_lb_keogh_rows(arr_a, arr_b, band: int, weights=None):
+    """Per-row LB_Keogh lower bounds for the "feature" metric."""
+    len_a = len(arr_a)
+    if arr_a.shape[1] != arr_b.shape[1]:
+        return np.full(len_a, np.inf)
+    w = _feature_weights(weights or {}, arr_a.shape[1])
+    arr_a = arr_a * w
+    arr_b = arr_b * w
+    # Pad so window i spans seq_b[i - band : i + band + 1]; callers guarantee
+    # band >= |len_a - len_b|, so there are at least len_a windows.
+    width = 2 * band + 1
+    dim = arr_b.shape[1]
+
+    def envelope(fill, reduce):
+        padded = np.concatenate([np.full((band, dim), fill), arr_b, np.full((width, dim), fill)])
+        out = padded[:len_a].copy()
+        for offset in range(1, width):
+            reduce(out, padded[offset:offset + len_a], out=out)
+        return out
+
+    upper = envelope(-np.inf, np.maximum)
+    lower = envelope(np.inf, np.minimum)
+    gap = np.maximum(lower - arr_a, 0.0) + np.maximum(arr_a - upper, 0.0)
+    return np.sqrt(np.einsum("id,id->i", gap, gap))
+
+
+def _dtw_search(query, candidates, k: int, band: int, metric: str = "cosine", weights=None, normalize: bool = True):
+    """Exact top-k of ``candidates`` by DTW cost against ``query``; returns (ranked, stats)."""
+    arr_q = _as_sequence_array(query)
+    query_mixed = _mixed_feature_lengths(metric, query)
+    stats = {"candidates": len(candidates), "pruned_kim": 0, "pruned_keogh": 0, "abandoned": 0, "computed": 0}
+    best = []  # max-heap of (-score, -index, cost) holding the k best so far
+    k = max(int(k), 1)
+
+    def kth_score():
+        return -best[0][0] if len(best) >= k else math.inf
+
+    def push(index, cost, scale):
+        entry = (-(cost / scale), -index, cost)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    prepared = []
+    for index, candidate in enumerate(candidates):
+        arr_c = _as_sequence_array(candidate)
+        if len(arr_q) == 0 or len(arr_c) == 0 or query_mixed or _mixed_feature_lengths(metric, candidate):
+            push(index, math.inf, 1.0)
+            continue
+        scale = float(max(len(arr_q), len(arr_c))) if normalize else 1.0
+        prepared.append((_dtw_lb_kim(arr_q, arr_c, metric, weights) / scale, index, arr_c, scale))
+    # Cheapest bound first tends to find tight k-th scores early.
+    prepared.sort(key=lambda item: (item[0], item[1]))
+
+    for lb_kim, index, arr_c, scale in prepared:
+        if lb_kim * (1 - _DTW_LB_SLACK) > kth_score():
+            stats["pruned_kim"] += 1
+            continue
+        cand_band = _dtw_band(band, len(arr_q), len(arr_c))
+        remaining = None
+        if metric == "feature":
+            rows = _dtw_lb_keogh_rows(arr_q, arr_c, cand_band, weights)
+            if rows.sum() / scale * (1 - _DTW_LB_SLACK) > kth_score():
+                stats["pruned_keogh"] += 1
+                continue
+            remaining = np.concatenate([np.cumsum(rows[::-1])[::-1][1:], [0.0]]) * (1 - _DTW_LB_SLACK)
+        dist = _dtw_band_distances(arr_q, arr_c, cand_band, metric, weights)
+        threshold = kth_score() * scale * (1 + _DTW_LB_SLACK)
+        if not np.isfinite(dist).any():
+            cost = math.inf
+        else:
+            cost = _dtw_accumulate(dist, cand_band, len(arr_c), threshold, remaining)
+        if math.isinf(cost) and threshold < math.inf:
+            stats["abandoned"] += 1
+            continue
+        stats["computed"] += 1
+        push(index, cost, scale)
+
+    ranked = sorted(((-neg_score, -neg_index, cost) for neg_score, neg_index, cost in best))
+    return [(index, cost) for _, index, cost in ranked], stats
+
+
+def _dtw_cell_distances(arr_a, arr_b, rows, cols, metric: str = "cosine", weights=None):
+    """Local costs for arbitrary (rows[n], cols[n]) cells, same metrics as _dtw_band_distances."""
+    dist = np.full(len(rows), np.inf)
+    if metric == "feature":
+        if arr_a.shape[1] != arr_b.shape[1]:
+            return dist
+        w = _feature_weights(weights or {}, arr_a.shape[1])
+        arr_a = arr_a * w
+        arr_b = arr_b * w
+    else:
+        dim = min(arr_a.shape[1], arr_b.shape[1])
+        norm_a = np.sqrt(np.einsum("id,id->i", arr_a, arr_a))
+        norm_b = np.sqrt(np.einsum("jd,jd->j", arr_b, arr_b))
+        arr_a = arr_a[:, :dim]
+        arr_b = arr_b[:, :dim]
+
+    block = max(1, DTW_GATHER_BUDGET // max(arr_a.shape[1], 1))
+    for start in range(0, len(rows), block):
+        r = rows[start:start + block]
+        c = cols[start:start + block]
+        if metric == "feature":
+            diff = arr_a[r] - arr_b[c]
+            dist[start:start + block] = np.sqrt(np.einsum("id,id->i", diff, diff))
+        else:
+            dot = np.einsum("id,id->i", arr_a[r], arr_b[c])
+            denom = norm_a[r] * norm_b[c]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                dist[start:start + block] = 1 - np.where(denom > 0, dot / denom, 0.0)
+    return dist
+
+
+def _dtw_window(arr_a, arr_b, lo, hi, metric: str = "cosine", weights=None):
+    """DTW over the cells lo[i] <= j <= hi[i] of each row; returns (cost, path)."""
+    len_a, len_b = len(arr_a), len(arr_b)
+    counts = hi - lo + 1
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    rows = np.repeat(np.arange(len_a), counts)
+    cols = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - lo, counts)
+    dist = _dtw_cell_distances(arr_a, arr_b, rows, cols, metric, weights)
+
+    acc = np.empty_like(dist)
+    prev = np.full(len_b + 1, np.inf)
+    curr = np.full(len_b + 1, np.inf)
+    prev[0] = 0.0
+    for i in range(len_a):
+        # curr still holds row i - 2; only its window needs clearing.
+        if i >= 2:
+            curr[lo[i - 2] + 1 : hi[i - 2] + 2] = np.inf
+        elif i == 1:
+            curr[0] = np.inf
+        _dtw_sweep_row(prev, curr, dist[offsets[i]:offsets[i + 1]], lo[i], hi[i])
+        acc[offsets[i]:offsets[i + 1]] = curr[lo[i] + 1 : hi[i] + 2]
+        prev, curr = curr, prev
+    cost = float(prev[len_b])
+    if not math.isfinite(cost):
+        return cost, []
+
+    def cell(i, j):
+        if i < 0 or j < 0 or j < lo[i] or j > hi[i]:
+            return math.inf
+        return acc[offsets[i] + j - lo[i]]
+
+    i, j = len_a - 1, len_b - 1
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        i, j = min(((i - 1, j - 1), (i - 1, j), (i, j - 1)), key=lambda ij: cell(*ij))
+        path.append((i, j))
+    path.reverse()
+    return cost, path
+
+
+def _coarsen(arr):
+    if len(arr) % 2:
+        arr = np.concatenate([arr, arr[-1:]])
+    return (arr[0::2] + arr[1::2]) / 2
+
+
+def _project_window(path, len_a: int, len_b: int, radius: int):
+    """Fine-resolution per-row column ranges covering a coarse path, widened by radius."""
+    coarse = np.asarray(path)
+    lo = np.full(len_a, len_b)
+    hi = np.full(len_a, -1)
+    for offset in (0, 1):
+        fine_rows = np.minimum(2 * coarse[:, 0] + offset, len_a - 1)
+        np.minimum.at(lo, fine_rows, 2 * coarse[:, 1])
+        np.maximum.at(hi, fine_rows, np.minimum(2 * coarse[:, 1] + 1, len_b - 1))
+    if radius > 0:
+        padded_lo = np.concatenate([np.full(radius, len_b), lo, np.full(radius, len_b)])
+        padded_hi = np.concatenate([np.full(radius, -1), hi, np.full(radius, -1)])
+        for offset in range(2 * radius + 1):
+            np.minimum(lo, padded_lo[offset:offset + len_a], out=lo)
+            np.maximum(hi, padded_hi[offset:offset + len_a], out=hi)
+    return np.clip(lo - radius, 0, len_b - 1), np.clip(hi + radius, 0, len_b - 1)
+
+
+def _fast_dtw(arr_a, arr_b, radius: int, metric: str = "cosine", weights=None):
+    """Coarse-to-fine DTW (FastDTW) refined inside the projected path window."""
+    len_a, len_b = len(arr_a), len(arr_b)
+    if len_a <= radius + 2 or len_b <= radius + 2:
+        return _dtw_window(
+            arr_a, arr_b, np.zeros(len_a, dtype=int), np.full(len_a, len_b - 1), metric, weights
+        )
+    _, coarse_path = _fast_dtw(_coarsen(arr_a), _coarsen(arr_b), radius, metric, weights)
+    if not coarse_path:
+        return math.inf, []
+    lo, hi = _project_window(coarse_path, len_a, len_b, radius)
+    return _dtw_window(arr_a, arr_b, lo, hi, metric, weights)
+
+
+def _dtw_mode(mode: Optional[str] = None) -> str:
+    mode = mode or CHOREO_DTW_MODE
+    if mode not in DTW_MODES:
+        raise HTTPException(status_code=400, detail=f"dtw_mode must be one of {sorted(DTW_MODES)}")
+    return mode
+
+
+def _sequence_dtw(seq_a, seq_b, metric: str = "cosine", weights=None, mode: Optional[str] = None, band: int = 10):
+    """Whole-sequence DTW as the endpoints score it; returns (cost, frames_a, frames_b)."""
+    if _dtw_mode(mode) == "multires":
+        arr_a = _as_sequence_array(seq_a)
+        arr_b = _as_sequence_array(seq_b)
+        if not len(arr_a) or not len(arr_b) or _mixed_feature_lengths(metric, seq_a, seq_b):
+            return math.inf, len(arr_a), len(arr_b)
+        cost, _ = _fast_dtw(arr_a, arr_b, DTW_FAST_RADIUS, metric, weights)
+        return cost, len(arr_a), len(arr_b)
+    seq_a = _downsample_vectors(seq_a, 300)
+    seq_b = _downsample_vectors(seq_b, 300)
+    return _dtw_cost(seq_a, seq_b, band, metric, weights), len(seq_a), len(seq_b)
+
+
+def _sequence_dtw_path(seq_a, seq_b, metric: str = "cosine", weights=None, mode: Optional[str] = None, band: int = 10):
+    """_sequence_dtw plus the warping path in original frame indices."""
+    if _dtw_mode(mode) == "multires":
+        arr_a = _as_sequence_array(seq_a)
+        arr_b = _as_sequence_array(seq_b)
+        if not len(arr_a) or not len(arr_b) or _mixed_feature_lengths(metric, seq_a, seq_b):
+            return math.inf, len(arr_a), len(arr_b), [], []
+        cost, path = _fast_dtw(arr_a, arr_b, DTW_FAST_RADIUS, metric, weights)
+        steps = []
+        if path:
+            rows, cols = np.asarray(path).T
+            steps = _dtw_cell_distances(arr_a, arr_b, rows, cols, metric, weights).tolist()
+        return cost, len(arr_a), len(arr_b), path, steps
+    stride_a = math.ceil(len(seq_a) / 300) if len(seq_a) > 300 else 1
+    stride_b = math.ceil(len(seq_b) / 300) if len(seq_b) > 300 else 1
+    seq_a = _downsample_vectors(seq_a, 300)
+    seq_b = _downsample_vectors(seq_b, 300)
+    cost, path, steps = _dtw_path(seq_a, seq_b, band, metric, weights)
+    path = [(i * stride_a, j * stride_b) for i, j in path]
+    return cost, len(seq_a), len(seq_b), path, steps
+
+
+def _alignment_payload(path, steps, times_a=None, times_b=None, max_points: int = 0):
+    """Columnar, evenly thinned view of a warping path, timed by each row's video time."""
+    max_points = max_points or DTW_PATH_MAX_POINTS
+    picks = range(len(path))
+    if len(path) > max_points:
+        picks = np.unique(np.linspace(0, len(path) - 1, max_points).round().astype(int)).tolist()
+    frames_a = [path[k][0] for k in picks]
+    frames_b = [path[k][1] for k in picks]
+    return {
+        "path_length": len(path),
+        "frames_a": frames_a,
+        "frames_b": frames_b,
+        "t_a": _frame_times(times_a, frames_a),
+        "t_b": _frame_times(times_b, frames_b),
+        "cost": [round(steps[k], 6) for k in picks],
+    }
+
+
+def _frame_times(times, frames):
+    if times is None or len(times) == 0 or (frames and max(frames) >= len(times)):
+        return None
+    return [round(float(times[f]), 3) for f in frames]
 
 
 def _cosine_similarity(a, b):
@@ -857,17 +2154,100 @@ def _not_similar_explain(parts: Dict[str, float], mid_a: float, mid_b: float):
     return {"dominant_parts": dominant_parts, "note": note}
 
 
+def _cosine_matrix(mat_a, mat_b):
+    """Pairwise _cosine_similarity for row stacks: dot over the shared prefix, full-row norms."""
+    dim = min(mat_a.shape[1], mat_b.shape[1])
+    dot = mat_a[:, :dim] @ mat_b[:, :dim].T
+    denom = np.linalg.norm(mat_a, axis=1)[:, None] * np.linalg.norm(mat_b, axis=1)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, dot / denom, 0.0)
+
+
+def _pool_segments(vectors, segments, fps):
+    """Mean vector of each segment's frames as a (segments, dim) matrix; empty clips pool to zeros."""
+    arr = _as_sequence_array(vectors)
+    sums = np.zeros((len(arr) + 1, arr.shape[1]))
+    np.cumsum(arr, axis=0, out=sums[1:])
+    pooled = np.zeros((len(segments), arr.shape[1]))
+    for row, seg in enumerate(segments):
+        start = min(int(seg["start"] * fps), len(arr))
+        end = min(int(seg["end"] * fps), len(arr))
+        if end > start:
+            pooled[row] = (sums[end] - sums[start]) / (end - start)
+    return pooled
+
+
+def _part_columns(dim: int):
+    return {
+        name: [idx * 3 + k for idx in idxs for k in range(3) if idx * 3 + k < dim]
+        for name, idxs in PART_MAP.items()
+    }
+
+
+def _top_k_indices(scores, k: int):
+    """Indices of the k largest scores, ties to the lower index, via partial selection."""
+    if k <= 0:
+        return np.zeros(0, dtype=int)
+    if k < len(scores):
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        pool = np.flatnonzero(scores >= kth)
+    else:
+        pool = np.arange(len(scores))
+    return pool[np.lexsort((pool, -scores[pool]))][:k]
+
+
+def _segment_phrase_matches(vectors_a, fps_a, vectors_b, fps_b, top_k: int = 3):
+    """Segment both sequences and match them; returns (segs_a, segs_b, matches)."""
+    segs_a = _segment_from_vectors(vectors_a, fps_a)
+    segs_b = _segment_from_vectors(vectors_b, fps_b)
+    return segs_a, segs_b, _phrase_matches(vectors_a, segs_a, fps_a, vectors_b, segs_b, fps_b, top_k)
+
+
+def _phrase_matches(vectors_a, segs_a, fps_a, vectors_b, segs_b, fps_b, top_k: int = 3):
+    """Best-matching B segments for every A segment."""
+    emb_a = _pool_segments(vectors_a, segs_a, fps_a)
+    emb_b = _pool_segments(vectors_b, segs_b, fps_b)
+    sims = _cosine_matrix(emb_a, emb_b)
+    cols_a = _part_columns(emb_a.shape[1])
+    cols_b = _part_columns(emb_b.shape[1])
+    part_sims = {
+        name: _cosine_matrix(emb_a[:, cols_a[name]], emb_b[:, cols_b[name]])
+        if cols_a[name] and cols_b[name]
+        else np.zeros(sims.shape)
+        for name in PART_MAP
+    }
+
+    matches = []
+    for row, seg in enumerate(segs_a):
+        mid_a = (float(seg.get("start", 0.0)) + float(seg.get("end", 0.0))) / 2
+        cands = []
+        for col in _top_k_indices(sims[row], top_k or 3):
+            seg_b = segs_b[col]
+            parts = {name: float(part_sims[name][row, col]) for name in PART_MAP}
+            sorted_parts = sorted(parts.items(), key=lambda x: x[1], reverse=True)
+            dominant = [name for name, _ in sorted_parts[:2]]
+            best = _PART_LABELS_JA.get(sorted_parts[0][0], "上半身")
+            worst = _PART_LABELS_JA.get(sorted_parts[-1][0], "下半身")
+            note = f"{best}の一致が強く、{worst}は差分あり（参考値）"
+            mid_b = (float(seg_b.get("start", 0.0)) + float(seg_b.get("end", 0.0))) / 2
+            cands.append(
+                {
+                    **seg_b,
+                    "similarity": float(sims[row, col]),
+                    "parts": parts,
+                    "explain": {"dominant_parts": dominant, "note": note},
+                    "not_similar": _not_similar_explain(parts, mid_a, mid_b),
+                }
+            )
+        matches.append({**seg, "candidates": cands})
+    return matches
+
+
 def _moving_average(values, window: int):
-  """Simple moving average for smoothing energy."""
-  if window <= 1:
-    return values
-  smoothed = []
-  half = window // 2
-  for i in range(len(values)):
-    start = max(0, i - half)
-    end = min(len(values), i + half + 1)
-    smoothed.append(sum(values[start:end]) / (end - start))
-  return smoothed
+    """Simple moving average for smoothing energy."""
+    if window <= 1:
+        return values
+    return _smooth_series(np.asarray(values, dtype=np.float64).reshape(-1, 1), window)[:, 0].tolist()
 
 
 def _frames_to_vectors(frames):
@@ -888,18 +2268,114 @@ def _frames_to_vectors(frames):
     return vectors
 
 
-def _assign_speakers(asr_segments, diar_segments):
+class _SpeakerIndex:
+    """Centred interval tree over diarization turns, so long turns don't slow lookups."""
+
+    def __init__(self, diar_segments):
+        turns = [(diar["start"], diar["end"], order, diar["speaker"]) for order, diar in enumerate(diar_segments)]
+        self.root = self._build(turns)
+
+    @classmethod
+    def _build(cls, turns):
+        if not turns:
+            return None
+        points = sorted(point for turn in turns for point in turn[:2])
+        center = points[len(points) // 2]
+        left, right, here = [], [], []
+        for turn in turns:
+            if turn[1] < center:
+                left.append(turn)
+            elif turn[0] > center:
+                right.append(turn)
+            else:
+                here.append(turn)
+        return (
+            center,
+            sorted(here, key=lambda turn: turn[0]),
+            sorted(here, key=lambda turn: turn[1], reverse=True),
+            cls._build(left),
+            cls._build(right),
+        )
+
+    def overlapping(self, start: float, end: float):
+        """Turns with start < ``end`` and end > ``start``, in no particular order."""
+        if start >= end:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if end <= center:
+                for turn in by_start:
+                    if turn[0] >= end:
+                        break
+                    yield turn
+                stack.append(left)
+            elif start >= center:
+                for turn in by_end:
+                    if turn[1] <= start:
+                        break
+                    yield turn
+                stack.append(right)
+            else:
+                yield from by_start
+                stack.append(left)
+                stack.append(right)
+
+    def speaker(self, start: float, end: float, default: str = "unknown"):
+        """Speaker of the single turn overlapping [start, end] the most; ties go to the earlier turn."""
+        best_speaker = default
+        best_overlap = 0.0
+        best_order = None
+        for ds, de, order, speaker in self.overlapping(start, end):
+            overlap = min(end, de) - max(start, ds)
+            if overlap > best_overlap or (overlap == best_overlap and best_order is not None and order < best_order):
+                best_overlap, best_order, best_speaker = overlap, order, speaker
+        return best_speaker
+
+
+def _split_by_speaker(seg, index: _SpeakerIndex, speaker: str):
+    """Cut a Whisper segment at speaker changes using its word timestamps."""
+    pieces = []
+    for word in seg.get("words") or []:
+        word_speaker = index.speaker(float(word.get("start", 0.0)), float(word.get("end", 0.0)), speaker)
+        speaker = word_speaker
+        if pieces and pieces[-1]["speaker"] == word_speaker:
+            pieces[-1]["end"] = float(word.get("end", 0.0))
+            pieces[-1]["words"].append(word.get("word", ""))
+            continue
+        pieces.append(
+            {
+                "start": float(word.get("start", 0.0)),
+                "end": float(word.get("end", 0.0)),
+                "speaker": word_speaker,
+                "words": [word.get("word", "")],
+            }
+        )
+    return [
+        {
+            "start": round(piece["start"], 3),
+            "end": round(piece["end"], 3),
+            "speaker": piece["speaker"],
+            "text": "".join(piece["words"]).strip(),
+        }
+        for piece in pieces
+    ]
+
+
+def _assign_speakers(asr_segments, diar_segments, split_words: bool = False):
+    index = _SpeakerIndex(diar_segments)
     assigned = []
     for seg in asr_segments:
         start, end = seg.get("start", 0.0), seg.get("end", 0.0)
-        best_speaker = "unknown"
-        best_overlap = 0.0
-        for diar in diar_segments:
-            ds, de = diar["start"], diar["end"]
-            overlap = max(0.0, min(end, de) - max(start, ds))
-            if overlap > best_overlap:
-                best_overlap = overlap
-                best_speaker = diar["speaker"]
+        best_speaker = index.speaker(start, end)
+        if split_words and seg.get("words"):
+            pieces = _split_by_speaker(seg, index, best_speaker)
+            if pieces:
+                assigned.extend(pieces)
+                continue
         assigned.append(
             {
                 "start": round(start, 3),
@@ -920,26 +2396,44 @@ def health():
 async def asr(
     file: UploadFile = File(...),
     language: str = Form("auto"),
+    stream: Optional[str] = Form(None),
+    vad: Optional[str] = Form(None),
 ):
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
+    if stream is not None and stream not in ASR_STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="stream must be ndjson or sse")
+    if vad is not None and vad != "energy":
+        raise HTTPException(status_code=400, detail="vad must be energy")
+
+    model = await _load_model("asr", load_asr_model, _asr_model)
+
+    if stream is not None:
+        # The stream outlives this handler, so it owns and removes the staged file.
+        staged = await _stage_upload(file)
+        return StreamingResponse(
+            _stream_transcription(staged, model, language, stream, vad), media_type=ASR_STREAM_FORMATS[stream]
+        )
 
-    model = load_asr_model()
-
-    with tempfile.NamedTemporaryFile(suffix=file.filename, delete=True) as tmp:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty file")
-
-        tmp.write(content)
-        tmp.flush()
-
+    vad_meta = None
+    with await _stage_upload(file) as staged:
         started = time.time()
         try:
-            result: Dict[str, Any] = model.transcribe(
-                tmp.name,
-                language=None if language == "auto" else language,
-            )
+            if vad is not None:
+                result, vad_meta = await _run_blocking(
+                    "asr",
+                    _transcribe_speech,
+                    model,
+                    staged.path,
+                    language=None if language == "auto" else language,
+                )
+            else:
+                result: Dict[str, Any] = await _run_blocking(
+                    "asr",
+                    model.transcribe,
+                    staged.path,
+                    language=None if language == "auto" else language,
+                )
         except Exception as exc:  # noqa: BLE001
             raise HTTPException(status_code=500, detail=str(exc)) from exc
         duration_ms = int((time.time() - started) * 1000)
@@ -952,6 +2446,8 @@ async def asr(
         "model": MODEL_NAME,
         "processing_ms": duration_ms,
     }
+    if vad_meta is not None:
+        meta["vad"] = {"mode": vad, **vad_meta}
 
     return {
         "transcript": transcript.strip(),
@@ -960,28 +2456,255 @@ async def asr(
     }
 
 
+def _merge_regions(regions, duration: float, min_length: float = 0.0):
+    """Merge (start, end) speech regions across short gaps, drop short ones, then pad."""
+    merged = []
+    for start, end in sorted(regions):
+        if merged and start - merged[-1][1] <= ASR_VAD_MERGE_GAP:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    padded = []
+    for start, end in merged:
+        if end - start < min_length:
+            continue
+        start = max(start - ASR_VAD_PAD, 0.0)
+        end = min(end + ASR_VAD_PAD, duration)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = max(padded[-1][1], end)
+        else:
+            padded.append([start, end])
+    return [(start, end) for start, end in padded if end > start]
+
+
+def _vad_regions(audio, sample_rate: int = ASR_SAMPLE_RATE):
+    """Speech regions of a float32 waveform, in seconds, from frame RMS energy."""
+    frame = max(int(sample_rate * ASR_VAD_FRAME_MS / 1000), 1)
+    count = len(audio) // frame
+    if not count:
+        return []
+    frames = np.asarray(audio[: count * frame], dtype=np.float64).reshape(count, frame)
+    level = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-12)
+    noise, loud = np.percentile(level, [10, 95])
+    threshold = ASR_VAD_FLOOR_DB
+    if loud - noise >= 6:
+        threshold = max(threshold, noise + 0.35 * (loud - noise))
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], (level > threshold).astype(np.int8), [0]])))
+    frame_s = frame / sample_rate
+    runs = [(start * frame_s, end * frame_s) for start, end in zip(edges[::2], edges[1::2])]
+    return _merge_regions(runs, len(audio) / sample_rate, ASR_VAD_MIN_SPEECH)
+
+
+def _transcribe_regions(model, audio, regions, sample_rate: int = ASR_SAMPLE_RATE, **options):
+    """Run Whisper once over ``regions`` spliced together and map timestamps back."""
+    gap = np.zeros(int(ASR_VAD_SPLICE_GAP * sample_rate), dtype=np.float32)
+    pieces = []
+    compact_starts = []
+    spans = []
+    position = 0
+    for start, end in regions:
+        clip = audio[int(start * sample_rate) : int(end * sample_rate)]
+        if not len(clip):
+            continue
+        compact_starts.append(position / sample_rate)
+        spans.append((int(start * sample_rate) / sample_rate, int(end * sample_rate) / sample_rate))
+        pieces.extend([clip, gap])
+        position += len(clip) + len(gap)
+    if not pieces:
+        return {"text": "", "segments": [], "language": options.get("language")}
+
+    result = model.transcribe(np.concatenate(pieces), **options)
+
+    def remap(t, is_start):
+        # Times inside a splice gap snap to the next region's start or this region's end.
+        index = max(bisect.bisect_right(compact_starts, t) - 1, 0)
+        start, end = spans[index]
+        mapped = start + t - compact_starts[index]
+        if mapped > end:
+            mapped = spans[index + 1][0] if is_start and index + 1 < len(spans) else end
+        return round(mapped, 3)
+
+    for seg in result.get("segments") or []:
+        seg["start"] = remap(float(seg.get("start", 0.0)), True)
+        seg["end"] = remap(float(seg.get("end", 0.0)), False)
+        for word in seg.get("words") or []:
+            word["start"] = remap(float(word.get("start", 0.0)), True)
+            word["end"] = remap(float(word.get("end", 0.0)), False)
+    return result
+
+
+def _transcribe_speech(model, path: str, turns=None, **options):
+    """Transcribe only the speech in ``path``; returns (result, vad meta)."""
+    audio = whisper.load_audio(path)
+    duration = len(audio) / ASR_SAMPLE_RATE
+    regions = _vad_regions(audio) if turns is None else _merge_regions(turns, duration)
+    result = _transcribe_regions(model, audio, regions, **options)
+    speech = sum(end - start for start, end in regions)
+    return result, {
+        "regions": len(regions),
+        "speech_s": round(speech, 3),
+        "duration_s": round(duration, 3),
+        "speech_ratio": round(speech / duration, 4) if duration else 0.0,
+    }
+
+
+class _AudioWindows:
+    """Overlapping mono float32 windows of a media file from one streaming ffmpeg."""
+
+    def __init__(self, path: str, window_s: float, overlap_s: float, sample_rate: int = ASR_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.window = max(int(window_s * sample_rate), 1)
+        self.overlap = min(max(int(overlap_s * sample_rate), 0), self.window // 2)
+        self.proc = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                "-i",
+                path,
+                "-vn",
+                "-ac",
+                "1",
+                "-ar",
+                str(sample_rate),
+                "-f",
+                "s16le",
+                "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.peek = b""
+        self.offset = 0  # input samples before self.tail
+        self.done = False
+
+    def read(self):
+        """Next (start_seconds, samples, is_last), or None once the input is exhausted."""
+        if self.done:
+            return None
+        need = (self.window - len(self.tail)) * 2
+        raw = self.peek + self.proc.stdout.read(need - len(self.peek))
+        # One sample of look-ahead tells whether this window is the last.
+        self.peek = self.proc.stdout.read(2) if len(raw) == need else b""
+        self.done = not self.peek
+        if self.done and self.proc.wait() != 0 and not self.offset and not raw:
+            raise RuntimeError(f"ffmpeg_failed: exit status {self.proc.returncode}")
+        fresh = np.frombuffer(raw[: len(raw) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+        if not len(fresh):
+            return None
+        audio = np.concatenate([self.tail, fresh])
+        start = self.offset / self.sample_rate
+        keep = 0 if self.done else self.overlap
+        self.offset += len(audio) - keep
+        self.tail = audio[len(audio) - keep :].copy()
+        return start, audio, self.done
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdout.close()
+
+
+async def _stream_transcription(
+    staged: _StagedUpload, model, language: str, fmt: str, vad: Optional[str] = None
+):
+    """Transcribe window by window, yielding NDJSON lines or SSE events."""
+
+    def encode(kind: str, payload: Dict[str, Any]):
+        if fmt == "sse":
+            return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"type": kind, **payload}) + "\n"
+
+    started = time.time()
+    windows = None
+    next_read = None
+    try:
+        windows = _AudioWindows(staged.path, ASR_CHUNK_SECONDS, ASR_CHUNK_OVERLAP)
+        detected = None if language == "auto" else language
+        half_overlap = windows.overlap / windows.sample_rate / 2
+        last_end = 0.0
+        prompt = ""
+        emitted = 0
+        chunks = 0
+        skipped = 0
+        first_segment_ms = None
+        duration = 0.0
+        next_read = asyncio.ensure_future(_run_blocking("media", windows.read))
+        while next_read is not None:
+            window = await next_read
+            next_read = None
+            if window is None:
+                break
+            start_s, audio, is_last = window
+            if not is_last:
+                next_read = asyncio.ensure_future(_run_blocking("media", windows.read))
+            chunks += 1
+            duration = start_s + len(audio) / windows.sample_rate
+            if vad is not None and not _vad_regions(audio):
+                skipped += 1
+                continue
+            result: Dict[str, Any] = await _run_blocking(
+                "asr", model.transcribe, audio, language=detected, initial_prompt=prompt or None
+            )
+            detected = detected or result.get("language")
+            cut = math.inf if is_last else duration - half_overlap
+            for seg in result.get("segments") or []:
+                seg_start = start_s + float(seg.get("start", 0.0))
+                seg_end = start_s + float(seg.get("end", 0.0))
+                text = (seg.get("text") or "").strip()
+                if seg_start >= cut or (seg_start + seg_end) / 2 < last_end or not text:
+                    continue
+                if first_segment_ms is None:
+                    first_segment_ms = int((time.time() - started) * 1000)
+                yield encode(
+                    "segment",
+                    {"id": emitted, "start": round(seg_start, 3), "end": round(seg_end, 3), "text": text},
+                )
+                emitted += 1
+                last_end = max(last_end, seg_end)
+                prompt = f"{prompt} {text}"[-200:].strip()
+        meta = {
+            "language": detected,
+            "duration": round(duration, 3),
+            "model": MODEL_NAME,
+            "chunks": chunks,
+            "skipped_chunks": skipped,
+            "segments": emitted,
+            "chunk_seconds": ASR_CHUNK_SECONDS,
+            "overlap_seconds": ASR_CHUNK_OVERLAP,
+            "first_segment_ms": first_segment_ms,
+            "processing_ms": int((time.time() - started) * 1000),
+        }
+        yield encode("done", {"meta": meta})
+    except Exception as exc:  # noqa: BLE001
+        yield encode("error", {"detail": f"{exc.__class__.__name__}: {exc}"})
+    finally:
+        if next_read is not None:
+            next_read.cancel()
+        if windows is not None:
+            windows.close()
+        staged.discard()
+
+
 @app.post("/diarize")
 async def diarize(file: UploadFile = File(...)):
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
 
-    pipeline = load_diarization()
+    pipeline = await _load_model("diarization", load_diarization, _diar_pipeline)
     if _diar_init_error:
         raise HTTPException(status_code=500, detail=f"Pipeline init failed: {_diar_init_error}")
     if pipeline is None:
         raise HTTPException(status_code=500, detail="Diarization pipeline unavailable")
 
-    with tempfile.NamedTemporaryFile(suffix=file.filename, delete=True) as tmp:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty file")
-        tmp.write(content)
-        tmp.flush()
-
+    with await _stage_upload(file) as staged:
         started = time.time()
         try:
           # pyannote uses torch; keep payload minimal
-            diarization = pipeline(tmp.name)
+            diarization = await _run_blocking("diarization", pipeline, staged.path)
         except Exception as exc:  # noqa: BLE001
             raise HTTPException(status_code=500, detail=str(exc)) from exc
         duration_ms = int((time.time() - started) * 1000)
@@ -1007,22 +2730,16 @@ async def embed(file: UploadFile = File(...)):
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
 
-    inference = load_embedding()
+    inference = await _load_model("embedding", load_embedding, _embed_inference)
     if _embed_init_error:
         raise HTTPException(status_code=500, detail=f"Embedding init failed: {_embed_init_error}")
     if inference is None:
         raise HTTPException(status_code=500, detail="Embedding model unavailable")
 
-    with tempfile.NamedTemporaryFile(suffix=file.filename, delete=True) as tmp:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty file")
-        tmp.write(content)
-        tmp.flush()
-
+    with await _stage_upload(file) as staged:
         started = time.time()
         try:
-            emb = inference(tmp.name)
+            emb = await _run_blocking("embedding", inference, staged.path)
         except Exception as exc:  # noqa: BLE001
             raise HTTPException(status_code=500, detail=str(exc)) from exc
         duration_ms = int((time.time() - started) * 1000)
@@ -1047,29 +2764,25 @@ async def compare(fileA: UploadFile = File(...), fileB: UploadFile = File(...)):
     if not fileA.filename or not fileB.filename:
         raise HTTPException(status_code=400, detail="fileA and fileB are required")
 
-    inference = load_embedding()
+    inference = await _load_model("embedding", load_embedding, _embed_inference)
     if _embed_init_error:
         raise HTTPException(status_code=500, detail=f"Embedding init failed: {_embed_init_error}")
     if inference is None:
         raise HTTPException(status_code=500, detail="Embedding model unavailable")
 
-    def infer_file(upload: UploadFile):
-        with tempfile.NamedTemporaryFile(suffix=upload.filename, delete=True) as tmp:
-            content = upload.file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail=f"{upload.filename} is empty")
-            tmp.write(content)
-            tmp.flush()
-            return inference(tmp.name)
-
-    started = time.time()
-    try:
-        emb_a = infer_file(fileA)
-        emb_b = infer_file(fileB)
-    except HTTPException:
-        raise
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
+    staged_a = await _stage_upload(fileA, f"{fileA.filename} is empty")
+    with staged_a:
+        with await _stage_upload(fileB, f"{fileB.filename} is empty") as staged_b:
+            started = time.time()
+            try:
+                emb_a, emb_b = await asyncio.gather(
+                    _run_blocking("embedding", inference, staged_a.path),
+                    _run_blocking("embedding", inference, staged_b.path),
+                )
+            except HTTPException:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
     duration_ms = int((time.time() - started) * 1000)
 
     list_a = emb_a.tolist()
@@ -1084,38 +2797,65 @@ async def compare(fileA: UploadFile = File(...), fileB: UploadFile = File(...)):
 
 
 @app.post("/asr_diarize")
-async def asr_diarize(file: UploadFile = File(...), language: str = Form("auto")):
+async def asr_diarize(
+    file: UploadFile = File(...),
+    language: str = Form("auto"),
+    split_words: bool = Form(False),
+    vad: Optional[str] = Form(None),
+):
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
+    _check_vad(vad)
+
+    with await _stage_upload(file) as staged:
+        return await _asr_diarize_file(staged.path, language, split_words, vad)
+
 
-    asr_model = load_asr_model()
-    diar_pipeline = load_diarization()
+def _check_vad(vad: Optional[str]):
+    if vad is not None and vad not in VAD_MODES:
+        raise HTTPException(status_code=400, detail=f"vad must be one of {sorted(VAD_MODES)}")
+
+
+async def _asr_diarize_file(path: str, language: str, split_words: bool = False, vad: Optional[str] = None):
+    asr_model = await _load_model("asr", load_asr_model, _asr_model)
+    diar_pipeline = await _load_model("diarization", load_diarization, _diar_pipeline)
     if _diar_init_error:
         raise HTTPException(status_code=500, detail=f"Pipeline init failed: {_diar_init_error}")
     if diar_pipeline is None:
         raise HTTPException(status_code=500, detail="Diarization pipeline unavailable")
 
-    with tempfile.NamedTemporaryFile(suffix=file.filename, delete=True) as tmp:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty file")
-        tmp.write(content)
-        tmp.flush()
+    stage_ms: Dict[str, int] = {}
 
-        started = time.time()
+    async def timed(family, fn, *args, **kwargs):
+        stage_started = time.time()
         try:
-            diarization = diar_pipeline(tmp.name)
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
+            return await _run_blocking(family, fn, *args, **kwargs)
+        finally:
+            stage_ms[family] = int((time.time() - stage_started) * 1000)
 
-        try:
-            asr_result: Dict[str, Any] = asr_model.transcribe(
-                tmp.name,
-                language=None if language == "auto" else language,
+    options = {"language": None if language == "auto" else language, "word_timestamps": split_words}
+    vad_meta = None
+    # The models only meet in _assign_speakers, so run them side by side on
+    # their own executors, unless ASR is gated on the diarization turns.
+    started = time.time()
+    try:
+        if vad == "diarization":
+            diarization = await timed("diarization", diar_pipeline, path)
+            turns = [(turn.start, turn.end) for turn, _ in diarization.itertracks()]
+            asr_result, vad_meta = await timed("asr", _transcribe_speech, asr_model, path, turns, **options)
+        elif vad == "energy":
+            diarization, (asr_result, vad_meta) = await asyncio.gather(
+                timed("diarization", diar_pipeline, path),
+                timed("asr", _transcribe_speech, asr_model, path, **options),
             )
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
-        duration_ms = int((time.time() - started) * 1000)
+        else:
+            diarization, asr_result = await asyncio.gather(
+                timed("diarization", diar_pipeline, path),
+                timed("asr", asr_model.transcribe, path, **options),
+            )
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
+    duration_ms = int((time.time() - started) * 1000)
 
     diar_segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -1129,10 +2869,15 @@ async def asr_diarize(file: UploadFile = File(...), language: str = Form("auto")
 
     asr_segments_raw = asr_result.get("segments") or []
     asr_segments = [
-        {"start": float(s.get("start", 0.0)), "end": float(s.get("end", 0.0)), "text": s.get("text", "").strip()}
+        {
+            "start": float(s.get("start", 0.0)),
+            "end": float(s.get("end", 0.0)),
+            "text": s.get("text", "").strip(),
+            "words": s.get("words"),
+        }
         for s in asr_segments_raw
     ]
-    assigned = _assign_speakers(asr_segments, diar_segments)
+    assigned = _assign_speakers(asr_segments, diar_segments, split_words)
 
     transcript = asr_result.get("text", "").strip()
     meta: Dict[str, Any] = {
@@ -1140,6 +2885,10 @@ async def asr_diarize(file: UploadFile = File(...), language: str = Form("auto")
         "language": asr_result.get("language"),
         "model": MODEL_NAME,
         "speakers_count": len({d["speaker"] for d in diar_segments}),
+        "asr_ms": stage_ms.get("asr"),
+        "split_words": split_words,
+        "vad": {"mode": vad, **vad_meta} if vad_meta is not None else None,
+        "diarization_ms": stage_ms.get("diarization"),
     }
 
     return {
@@ -1155,18 +2904,37 @@ async def choreo_pose(
     backend: str = Form("mediapipe"),
     sample_fps: int = Form(15),
     max_seconds: int = Form(30),
+    format: str = Form("json"),
+    dtype: str = Form("float32"),
+    model_complexity: Optional[int] = Form(None),
 ):
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
+    model_complexity = _pose_complexity(model_complexity)
+    if format not in {"json", "binary"}:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if dtype not in POSE_ARTIFACT_DTYPES:
+        raise HTTPException(status_code=400, detail="Invalid dtype")
 
-    content = await file.read()
-    try:
-        result = _extract_pose_frames(content, backend, sample_fps, max_seconds)
-    except HTTPException:
-        raise
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
+    with await _stage_upload(file, "Empty input file") as staged:
+        try:
+            result = await _run_blocking(
+                "pose",
+                _extract_pose_frames,
+                staged.path,
+                backend,
+                sample_fps,
+                max_seconds,
+                staged.sha256,
+                model_complexity,
+            )
+        except HTTPException:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
 
+    if format == "binary":
+        return Response(content=_encode_pose_artifact(result, dtype), media_type=POSE_ARTIFACT_MEDIA_TYPE)
     return {
         "meta": result["meta"],
         "frames": result["frames"],
@@ -1182,9 +2950,20 @@ async def pose_extract(
     backend: str = Form("mediapipe"),
     sample_fps: int = Form(15),
     max_seconds: int = Form(30),
+    model_complexity: Optional[int] = Form(None),
 ):
-    content = await file.read()
-    return _extract_pose_frames(content, backend, sample_fps, max_seconds)
+    model_complexity = _pose_complexity(model_complexity)
+    with await _stage_upload(file, "Empty input file") as staged:
+        return await _run_blocking(
+            "pose",
+            _extract_pose_frames,
+            staged.path,
+            backend,
+            sample_fps,
+            max_seconds,
+            staged.sha256,
+            model_complexity,
+        )
 
 
 @app.post("/choreo/compare")
@@ -1194,21 +2973,23 @@ async def choreo_compare(
     backend: str = Form("mediapipe"),
     sample_fps: float = Form(10),
     max_seconds: float = Form(30),
+    dtw_mode: Optional[str] = Form(None),
+    include_path: bool = Form(False),
 ):
     if backend != "mediapipe":
         raise HTTPException(status_code=501, detail="backend not enabled")
     if not fileA.filename or not fileB.filename:
         raise HTTPException(status_code=400, detail="fileA and fileB are required")
+    dtw_mode = _dtw_mode(dtw_mode)
 
-    content_a = await fileA.read()
-    content_b = await fileB.read()
-    if not content_a or not content_b:
-        raise HTTPException(status_code=400, detail="Empty fileA or fileB")
+    staged_a, staged_b = await _stage_uploads(fileA, fileB, empty_detail="Empty fileA or fileB")
 
     started = time.time()
     try:
-        result_a = _process_pose_bytes(content_a, sample_fps, max_seconds)
-        result_b = _process_pose_bytes(content_b, sample_fps, max_seconds)
+        with staged_a, staged_b:
+            result_a, result_b = await _process_pose_pair(
+                staged_a.path, staged_b.path, sample_fps, max_seconds, staged_a.sha256, staged_b.sha256
+            )
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -1223,19 +3004,28 @@ async def choreo_compare(
     if _has_invalid_vectors(features_a) or _has_invalid_vectors(features_b):
         warnings.append("EXTRACT_FAILED")
 
-    seq_a = _downsample_vectors(features_a, 300) if features_a else []
-    seq_b = _downsample_vectors(features_b, 300) if features_b else []
     dtw_cost = None
     distance = None
     similarity = 0.0
-    if seq_a and seq_b and not warnings:
+    alignment = None
+    if features_a and features_b and not warnings:
         weights = {
             "arms": CHOREO_WEIGHT_ARMS,
             "legs": CHOREO_WEIGHT_LEGS,
             "torso": CHOREO_WEIGHT_TORSO,
         }
-        dtw_cost = _dtw_cost(seq_a, seq_b, 10, lambda a, b: _feature_distance(a, b, weights))
-        norm = max(len(seq_a), len(seq_b))
+        if include_path:
+            dtw_cost, len_a, len_b, path, steps = await _run_blocking(
+                "choreo", _sequence_dtw_path, features_a, features_b, "feature", weights, dtw_mode
+            )
+            alignment = _alignment_payload(
+                path, steps, result_a.get("feature_times"), result_b.get("feature_times")
+            )
+        else:
+            dtw_cost, len_a, len_b = await _run_blocking(
+                "choreo", _sequence_dtw, features_a, features_b, "feature", weights, dtw_mode
+            )
+        norm = max(len_a, len_b)
         distance = dtw_cost / norm if norm > 0 else None
         if distance is not None and math.isfinite(distance):
             similarity = math.exp(-CHOREO_SIM_ALPHA * distance)
@@ -1251,15 +3041,19 @@ async def choreo_compare(
             "rotate": CHOREO_NORMALIZE_ROTATE,
         },
         "distance": distance,
+        "dtw_mode": dtw_mode,
         "warnings": warnings,
         "processing_ms": duration_ms,
     }
 
-    return {
+    response = {
         "similarity": similarity,
         "dtw_cost": dtw_cost,
         "meta": meta,
     }
+    if include_path:
+        response["alignment"] = alignment
+    return response
 
 
 @app.post("/choreo/compare_dtw")
@@ -1276,15 +3070,14 @@ async def choreo_compare_dtw(
     if not fileA.filename or not fileB.filename:
         raise HTTPException(status_code=400, detail="fileA and fileB are required")
 
-    content_a = await fileA.read()
-    content_b = await fileB.read()
-    if not content_a or not content_b:
-        raise HTTPException(status_code=400, detail="Empty fileA or fileB")
+    staged_a, staged_b = await _stage_uploads(fileA, fileB, empty_detail="Empty fileA or fileB")
 
     started = time.time()
     try:
-        result_a = _process_pose_bytes(content_a, sample_fps, max_seconds)
-        result_b = _process_pose_bytes(content_b, sample_fps, max_seconds)
+        with staged_a, staged_b:
+            result_a, result_b = await _process_pose_pair(
+                staged_a.path, staged_b.path, sample_fps, max_seconds, staged_a.sha256, staged_b.sha256
+            )
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -1298,91 +3091,96 @@ async def choreo_compare_dtw(
 
     fps_a = result_a.get("meta", {}).get("sample_fps") or sample_fps or 10
     fps_b = result_b.get("meta", {}).get("sample_fps") or sample_fps or 10
-    segs_a = _segment_from_vectors(vectors_a, fps_a)
-    segs_b = _segment_from_vectors(vectors_b, fps_b)
-    if not segs_a:
-        segs_a = [{"start": 0.0, "end": result_a.get("seconds_used") or 0.0, "reason": "full"}]
-    if not segs_b:
-        segs_b = [{"start": 0.0, "end": result_b.get("seconds_used") or 0.0, "reason": "full"}]
-
-    def to_indices(seg, fps_val, total):
-        start_idx = max(0, int(float(seg.get("start", 0.0)) * fps_val))
-        end_idx = min(total, int(float(seg.get("end", 0.0)) * fps_val))
-        if end_idx <= start_idx:
-            end_idx = min(total, start_idx + max(1, int(0.5 * fps_val)))
-        return start_idx, end_idx
-
-    def pool_segment(vecs, start_idx, end_idx):
-        clip = vecs[start_idx:end_idx] if end_idx > start_idx else []
-        return _pool_vectors(clip) if clip else []
 
-    phrases = []
-    total_weight = 0.0
-    total_similarity = 0.0
-    total_cost = 0.0
-
-    for idx, seg_a in enumerate(segs_a):
-        start_idx_a, end_idx_a = to_indices(seg_a, fps_a, len(vectors_a))
-        clip_a = vectors_a[start_idx_a:end_idx_a]
-        if not clip_a:
-            continue
-        mid_a = (float(seg_a.get("start", 0.0)) + float(seg_a.get("end", 0.0))) / 2
-        closest_b = min(
-            segs_b,
-            key=lambda seg_b: abs(
-                (float(seg_b.get("start", 0.0)) + float(seg_b.get("end", 0.0))) / 2 - mid_a
-            ),
-        )
-        start_idx_b, end_idx_b = to_indices(closest_b, fps_b, len(vectors_b))
-        clip_b = vectors_b[start_idx_b:end_idx_b]
-        if not clip_b:
-            continue
+    def score_phrases():
+        segs_a = _segment_from_vectors(vectors_a, fps_a)
+        segs_b = _segment_from_vectors(vectors_b, fps_b)
+        if not segs_a:
+            segs_a = [{"start": 0.0, "end": result_a.get("seconds_used") or 0.0, "reason": "full"}]
+        if not segs_b:
+            segs_b = [{"start": 0.0, "end": result_b.get("seconds_used") or 0.0, "reason": "full"}]
+
+        def to_indices(seg, fps_val, total):
+            start_idx = max(0, int(float(seg.get("start", 0.0)) * fps_val))
+            end_idx = min(total, int(float(seg.get("end", 0.0)) * fps_val))
+            if end_idx <= start_idx:
+                end_idx = min(total, start_idx + max(1, int(0.5 * fps_val)))
+            return start_idx, end_idx
+
+        def pool_segment(vecs, start_idx, end_idx):
+            clip = vecs[start_idx:end_idx] if end_idx > start_idx else []
+            return _pool_vectors(clip) if clip else []
+
+        phrases = []
+        total_weight = 0.0
+        total_similarity = 0.0
+        total_cost = 0.0
+
+        for idx, seg_a in enumerate(segs_a):
+            start_idx_a, end_idx_a = to_indices(seg_a, fps_a, len(vectors_a))
+            clip_a = vectors_a[start_idx_a:end_idx_a]
+            if not clip_a:
+                continue
+            mid_a = (float(seg_a.get("start", 0.0)) + float(seg_a.get("end", 0.0))) / 2
+            closest_b = min(
+                segs_b,
+                key=lambda seg_b: abs(
+                    (float(seg_b.get("start", 0.0)) + float(seg_b.get("end", 0.0))) / 2 - mid_a
+                ),
+            )
+            start_idx_b, end_idx_b = to_indices(closest_b, fps_b, len(vectors_b))
+            clip_b = vectors_b[start_idx_b:end_idx_b]
+            if not clip_b:
+                continue
 
-        cost = _dtw_cost(clip_a, clip_b, band)
-        norm = max(len(clip_a), len(clip_b))
-        similarity = math.exp(-cost / norm) if norm > 0 else 0.0
-        similarity = max(0.0, min(1.0, similarity))
-
-        pooled_a = pool_segment(vectors_a, start_idx_a, end_idx_a)
-        pooled_b = pool_segment(vectors_b, start_idx_b, end_idx_b)
-        parts = _part_similarity(pooled_a, pooled_b) if pooled_a and pooled_b else {}
-        sorted_parts = sorted(parts.items(), key=lambda x: x[1], reverse=True)
-        key_joints = []
-        for name, _ in sorted_parts[:2]:
-            if name == "upper":
-                key_joints.append("arms")
-            elif name == "lower":
-                key_joints.append("legs")
-            else:
-                key_joints.append("core")
+            cost = _dtw_cost(clip_a, clip_b, band)
+            norm = max(len(clip_a), len(clip_b))
+            similarity = math.exp(-cost / norm) if norm > 0 else 0.0
+            similarity = max(0.0, min(1.0, similarity))
 
-        confidence = "Low"
-        if similarity >= 0.8:
-            confidence = "High"
-        elif similarity >= 0.6:
-            confidence = "Medium"
+            pooled_a = pool_segment(vectors_a, start_idx_a, end_idx_a)
+            pooled_b = pool_segment(vectors_b, start_idx_b, end_idx_b)
+            parts = _part_similarity(pooled_a, pooled_b) if pooled_a and pooled_b else {}
+            sorted_parts = sorted(parts.items(), key=lambda x: x[1], reverse=True)
+            key_joints = []
+            for name, _ in sorted_parts[:2]:
+                if name == "upper":
+                    key_joints.append("arms")
+                elif name == "lower":
+                    key_joints.append("legs")
+                else:
+                    key_joints.append("core")
 
-        duration = max(0.0, float(seg_a.get("end", 0.0)) - float(seg_a.get("start", 0.0)))
-        total_weight += duration
-        total_similarity += similarity * duration
-        total_cost += cost * duration
+            confidence = "Low"
+            if similarity >= 0.8:
+                confidence = "High"
+            elif similarity >= 0.6:
+                confidence = "Medium"
 
-        phrases.append(
-            {
-                "phrase_id": f"p{idx + 1}",
-                "start": float(seg_a.get("start", 0.0)),
-                "end": float(seg_a.get("end", 0.0)),
-                "similarity": similarity,
-                "key_joints": key_joints,
-                "confidence": confidence,
-            }
-        )
+            duration = max(0.0, float(seg_a.get("end", 0.0)) - float(seg_a.get("start", 0.0)))
+            total_weight += duration
+            total_similarity += similarity * duration
+            total_cost += cost * duration
+
+            phrases.append(
+                {
+                    "phrase_id": f"p{idx + 1}",
+                    "start": float(seg_a.get("start", 0.0)),
+                    "end": float(seg_a.get("end", 0.0)),
+                    "similarity": similarity,
+                    "key_joints": key_joints,
+                    "confidence": confidence,
+                }
+            )
+
+        if total_weight <= 0:
+            total_weight = max(1.0, float(result_a.get("seconds_used") or 1.0))
 
-    if total_weight <= 0:
-        total_weight = max(1.0, float(result_a.get("seconds_used") or 1.0))
+        similarity = total_similarity / total_weight if total_weight else 0.0
+        dtw_cost = total_cost / total_weight if total_weight else 0.0
+        return phrases, similarity, dtw_cost
 
-    similarity = total_similarity / total_weight if total_weight else 0.0
-    dtw_cost = total_cost / total_weight if total_weight else 0.0
+    phrases, similarity, dtw_cost = await _run_blocking("choreo", score_phrases)
 
     meta = {
         "processing_ms": duration_ms,
@@ -1411,13 +3209,12 @@ async def choreo_segment(
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
+    staged = await _stage_upload(file)
 
     started = time.time()
     try:
-        result = _process_pose_bytes(content, sample_fps, max_seconds)
+        with staged:
+            result = await _process_pose_file_async(staged.path, sample_fps, max_seconds, staged.sha256)
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -1428,47 +3225,8 @@ async def choreo_segment(
     if len(vectors) < 2:
         raise HTTPException(status_code=400, detail="Pose landmarks not found or too short")
 
-    energies = []
-    for i in range(1, len(vectors)):
-        diff = [a - b for a, b in zip(vectors[i], vectors[i - 1])]
-        norm = sum(d * d for d in diff) ** 0.5
-        energies.append(norm / max(len(diff), 1))
-    smooth = _moving_average(energies, 5)
-
     fps = result.get("meta", {}).get("sample_fps") or sample_fps or 10
-    min_seg_frames = max(1, int(2.0 * fps))
-    mean_energy = sum(smooth) / len(smooth)
-    low_thresh = 0.5 * mean_energy if mean_energy > 0 else 0.0
-    high_thresh = 1.2 * mean_energy if mean_energy > 0 else 0.0
-
-    segments = []
-    last_cut = 0
-    reason = "init"
-    for idx, val in enumerate(smooth):
-        if idx - last_cut < min_seg_frames:
-            continue
-        if val < low_thresh:
-            reason = "low_energy"
-            segments.append((last_cut, idx, reason))
-            last_cut = idx
-        elif val > high_thresh and idx + 1 < len(smooth) and smooth[idx + 1] < val * 0.6:
-            reason = "peak_drop"
-            segments.append((last_cut, idx, reason))
-            last_cut = idx
-    if last_cut < len(smooth):
-        segments.append((last_cut, len(smooth), "tail"))
-
-    segment_secs = []
-    for start, end, why in segments:
-        if end - start < min_seg_frames:
-            continue
-        segment_secs.append(
-            {
-                "start": round(start / fps, 3),
-                "end": round(end / fps, 3),
-                "reason": why,
-            }
-        )
+    segment_secs, smooth = await _run_blocking("choreo", _segment_with_energy, vectors, fps)
 
     energy_preview = smooth[:200]
     meta = {
@@ -1490,35 +3248,52 @@ def _segment_from_vectors(vectors, fps):
     return segments
 
 
-def _segment_with_energy(vectors, fps):
-    energies = []
-    for i in range(1, len(vectors)):
-        diff = [a - b for a, b in zip(vectors[i], vectors[i - 1])]
-        norm = sum(d * d for d in diff) ** 0.5
-        energies.append(norm / max(len(diff), 1))
-    smooth = _moving_average(energies, 5)
+def _frame_energy(vectors):
+    """Motion between consecutive frames: L2 norm of the vector difference over its dimension."""
+    arr = _as_sequence_array(vectors)
+    if len(arr) < 2:
+        return np.zeros(0)
+    diff = np.diff(arr, axis=0)
+    return np.sqrt(np.einsum("id,id->i", diff, diff)) / max(arr.shape[1], 1)
 
-    min_seg_frames = max(1, int(2.0 * fps))
-    mean_energy = sum(smooth) / len(smooth)
+
+def _segment_cuts(smooth, min_seg_frames: int):
+    """Cut points over smoothed energy as [(start, end, reason)]."""
+    smooth = np.asarray(smooth, dtype=np.float64)
+    length = len(smooth)
+    mean_energy = float(smooth.mean()) if length else 0.0
     low_thresh = 0.5 * mean_energy if mean_energy > 0 else 0.0
     high_thresh = 1.2 * mean_energy if mean_energy > 0 else 0.0
 
+    low = smooth < low_thresh
+    peak = np.zeros(length, dtype=bool)
+    peak[:-1] = (smooth[:-1] > high_thresh) & (smooth[1:] < smooth[:-1] * 0.6)
+    candidates = np.flatnonzero(low | peak)
+
     segments = []
     last_cut = 0
-    for idx, val in enumerate(smooth):
-        if idx - last_cut < min_seg_frames:
-            continue
-        if val < low_thresh:
-            segments.append((last_cut, idx, "low_energy"))
-            last_cut = idx
-        elif val > high_thresh and idx + 1 < len(smooth) and smooth[idx + 1] < val * 0.6:
-            segments.append((last_cut, idx, "peak_drop"))
-            last_cut = idx
-    if last_cut < len(smooth):
-        segments.append((last_cut, len(smooth), "tail"))
+    while True:
+        pos = int(np.searchsorted(candidates, last_cut + min_seg_frames))
+        if pos >= len(candidates):
+            break
+        idx = int(candidates[pos])
+        segments.append((last_cut, idx, "low_energy" if low[idx] else "peak_drop"))
+        last_cut = idx
+    if last_cut < length:
+        segments.append((last_cut, length, "tail"))
+    return segments
+
+
+def _segment_with_energy(vectors, fps):
+    """Motion-energy segmentation; returns (segments in seconds, smoothed energy)."""
+    energy = _frame_energy(vectors)
+    if not len(energy):
+        return [], []
+    smooth = _smooth_series(energy.reshape(-1, 1), 5)[:, 0]
+    min_seg_frames = max(1, int(2.0 * fps))
 
     segment_secs = []
-    for start, end, why in segments:
+    for start, end, why in _segment_cuts(smooth, min_seg_frames):
         if end - start < min_seg_frames:
             continue
         segment_secs.append(
@@ -1529,16 +3304,232 @@ def _segment_with_energy(vectors, fps):
             }
         )
 
-    return segment_secs, smooth
+    return segment_secs, smooth.tolist()
+
+
+def _artifact_align(offset: int, alignment: int = 16):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _encode_pose_artifact(result: Dict[str, Any], dtype: str = "float32"):
+    """Pack a /choreo/pose result into the binary pose artifact format."""
+    meta = result.get("meta") or {}
+    frames = result.get("frames") or []
+    backend = meta.get("backend", "mediapipe")
+    names = COCO17_NAMES if backend == "mmpose" else POSE_LANDMARK_NAMES
+    num_landmarks = max([len(frame.get("landmarks") or []) for frame in frames] + [len(names)])
+
+    landmarks = np.full((len(frames), num_landmarks, 4), np.nan, dtype=np.float32)
+    times = np.zeros(len(frames), dtype=np.float32)
+    for idx, frame in enumerate(frames):
+        times[idx] = float(frame.get("t", 0.0))
+        for j, lm in enumerate(frame.get("landmarks") or []):
+            score = lm.get("score")
+            if score is None:
+                score = lm.get("visibility", 0.0)
+            landmarks[idx, j] = (lm.get("x", 0.0), lm.get("y", 0.0), lm.get("z", 0.0), score or 0.0)
+
+    header = json.dumps(
+        {
+            "dtype": POSE_ARTIFACT_DTYPES[dtype],
+            "shape": list(landmarks.shape),
+            "channels": ["x", "y", "z", "score"],
+            "fps": meta.get("sample_fps"),
+            "backend": backend,
+            "layout": "coco17" if backend == "mmpose" else "mediapipe33",
+            "landmark_names": [
+                names[idx] if idx < len(names) else f"idx_{idx}" for idx in range(num_landmarks)
+            ],
+            "meta": meta,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = POSE_ARTIFACT_MAGIC + struct.pack("<HHI", POSE_ARTIFACT_VERSION, 0, len(header))
+    times_offset = _artifact_align(len(prefix) + len(header))
+    data_offset = _artifact_align(times_offset + times.nbytes)
+    return b"".join(
+        [
+            prefix,
+            header,
+            b" " * (times_offset - len(prefix) - len(header)),
+            times.tobytes(),
+            b"\x00" * (data_offset - times_offset - times.nbytes),
+            landmarks.astype(POSE_ARTIFACT_DTYPES[dtype]).tobytes(),
+        ]
+    )
+
+
+def _is_pose_artifact(buf) -> bool:
+    return bytes(buf[: len(POSE_ARTIFACT_MAGIC)]) == POSE_ARTIFACT_MAGIC
+
+
+def _decode_pose_artifact(buf):
+    """Read a pose artifact from bytes, a memoryview or an mmap without copying."""
+    prefix_len = len(POSE_ARTIFACT_MAGIC) + 8
+    if len(buf) < prefix_len or not _is_pose_artifact(buf):
+        raise ValueError("Not a pose artifact")
+    version, _, header_len = struct.unpack_from("<HHI", buf, len(POSE_ARTIFACT_MAGIC))
+    if version != POSE_ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported pose artifact version {version}")
+    header = json.loads(bytes(buf[prefix_len:prefix_len + header_len]).decode("utf-8"))
+    num_frames, num_landmarks, channels = header["shape"]
+    times_offset = _artifact_align(prefix_len + header_len)
+    data_offset = _artifact_align(times_offset + 4 * num_frames)
+    times = np.frombuffer(buf, dtype="<f4", count=num_frames, offset=times_offset)
+    landmarks = np.frombuffer(
+        buf, dtype=header["dtype"], count=num_frames * num_landmarks * channels, offset=data_offset
+    ).reshape(num_frames, num_landmarks, channels)
+
+    detected = ~np.all(np.isnan(landmarks[..., 3]), axis=1) if num_landmarks else np.zeros(num_frames, bool)
+    vectors = np.nan_to_num(landmarks[detected][..., [0, 1, 3]].astype(np.float64)).reshape(
+        int(detected.sum()), -1
+    )
+    return {
+        **header,
+        "meta": header.get("meta") or {},
+        "t": times,
+        "landmarks": landmarks,
+        "vectors": vectors.tolist(),
+    }
+
+
+_http_idle: Dict[Any, List[http.client.HTTPConnection]] = {}
+_http_idle_lock = threading.Lock()
+_pose_fetch_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_pose_fetch_cache_lock = threading.Lock()
+
+
+def _http_checkout(scheme: str, netloc: str):
+    with _http_idle_lock:
+        idle = _http_idle.get((scheme, netloc))
+        if idle:
+            return idle.pop(), True
+    conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    return conn_cls(netloc, timeout=POSE_FETCH_TIMEOUT), False
+
+
+def _http_release(scheme: str, netloc: str, conn: http.client.HTTPConnection, resp):
+    if resp.will_close:
+        conn.close()
+        return
+    with _http_idle_lock:
+        idle = _http_idle.setdefault((scheme, netloc), [])
+        if len(idle) < POSE_FETCH_POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def _fetch_time_left(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError(f"Fetch took longer than {POSE_FETCH_TIMEOUT:g}s")
+    return remaining
+
+
+def _read_limited(resp, max_bytes: int, deadline: Optional[float] = None, sock=None):
+    """Read the body up to ``max_bytes``, giving up once ``deadline`` (monotonic) passes."""
+    length = resp.getheader("Content-Length")
+    if length is not None and length.isdigit() and int(length) > max_bytes:
+        raise ValueError(f"Response larger than {max_bytes} bytes")
+    read = getattr(resp, "read1", resp.read)
+    chunks = []
+    total = 0
+    while True:
+        if deadline is not None:
+            remaining = _fetch_time_left(deadline)
+            if sock is not None:
+                sock.settimeout(remaining)
+        chunk = read(min(UPLOAD_CHUNK_BYTES, max_bytes + 1 - total))
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise ValueError(f"Response larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    # read1 never marks the response complete; read() at EOF does, so the connection can be reused.
+    resp.read()
+    return b"".join(chunks)
+
+
+def _http_get(url: str, redirects: int = 3, deadline: Optional[float] = None):
+    """GET ``url`` over a pooled keep-alive connection within POSE_FETCH_* limits."""
+    if deadline is None:
+        deadline = time.monotonic() + POSE_FETCH_TIMEOUT
+    max_bytes = POSE_FETCH_MAX_MB * 1024 * 1024
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in {"http", "https"}:
+        with urllib.request.urlopen(url, timeout=_fetch_time_left(deadline)) as resp:
+            return _read_limited(resp, max_bytes, deadline)
+
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    while True:
+        conn, reused = _http_checkout(parts.scheme, parts.netloc)
+        try:
+            conn.timeout = _fetch_time_left(deadline)
+            if conn.sock is not None:
+                conn.sock.settimeout(conn.timeout)
+            conn.request("GET", target, headers={"Connection": "keep-alive"})
+            resp = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            if reused:
+                # The server dropped an idle keep-alive connection; retry on a fresh one.
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+        break
+
+    try:
+        if resp.status in {301, 302, 303, 307, 308} and resp.getheader("Location"):
+            _read_limited(resp, max_bytes, deadline, conn.sock)
+            location = urllib.parse.urljoin(url, resp.getheader("Location"))
+            if redirects <= 0:
+                raise ValueError("Too many redirects")
+            _http_release(parts.scheme, parts.netloc, conn, resp)
+            return _http_get(location, redirects - 1, deadline)
+        if resp.status != 200:
+            raise ValueError(f"HTTP {resp.status} {resp.reason}")
+        data = _read_limited(resp, max_bytes, deadline, conn.sock)
+    except Exception:
+        conn.close()
+        raise
+    _http_release(parts.scheme, parts.netloc, conn, resp)
+    return data
+
+
+def _pose_fetch_cache_key(url: str):
+    # Signed storage URLs rotate their query tokens; the object path identifies the pose.
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
 
 
 def _load_pose_json(url: str):
+    key = _pose_fetch_cache_key(url)
+    with _pose_fetch_cache_lock:
+        cached = _pose_fetch_cache.get(key)
+        if cached is not None:
+            _pose_fetch_cache.move_to_end(key)
+            return cached
     try:
-        with urllib.request.urlopen(url) as resp:
-            data = resp.read()
-        return json.loads(data.decode("utf-8"))
+        data = _http_get(url)
+        if _is_pose_artifact(data):
+            pose = _decode_pose_artifact(data)
+        else:
+            pose = json.loads(data.decode("utf-8"))
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=400, detail=f"Failed to fetch pose json: {exc}") from exc
+    if POSE_FETCH_CACHE_ENTRIES > 0:
+        with _pose_fetch_cache_lock:
+            _pose_fetch_cache[key] = pose
+            _pose_fetch_cache.move_to_end(key)
+            while len(_pose_fetch_cache) > POSE_FETCH_CACHE_ENTRIES:
+                _pose_fetch_cache.popitem(last=False)
+    return pose
 
 
 def _detect_peaks(series, min_distance=3, max_peaks=200):
@@ -1562,37 +3553,34 @@ def _detect_peaks(series, min_distance=3, max_peaks=200):
     return peaks
 
 
-def _audio_peaks_from_video_bytes(video_bytes: bytes, max_seconds: float, max_peaks: int = 200):
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=True) as tmp_video:
-        tmp_video.write(video_bytes)
-        tmp_video.flush()
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp_wav:
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                tmp_video.name,
-                "-t",
-                str(max_seconds),
-                "-vn",
-                "-ac",
-                "1",
-                "-ar",
-                "16000",
-                tmp_wav.name,
-            ]
-            try:
-                subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            except Exception as exc:  # noqa: BLE001
-                raise HTTPException(status_code=500, detail=f"ffmpeg_failed: {exc}") from exc
+def _audio_peaks_from_video(video_path: str, max_seconds: float, max_peaks: int = 200):
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp_wav:
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            video_path,
+            "-t",
+            str(max_seconds),
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            tmp_wav.name,
+        ]
+        try:
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=f"ffmpeg_failed: {exc}") from exc
 
-            try:
-                with wave.open(tmp_wav.name, "rb") as wf:
-                    sr = wf.getframerate()
-                    n = wf.getnframes()
-                    raw = wf.readframes(n)
-            except Exception as exc:  # noqa: BLE001
-                raise HTTPException(status_code=500, detail=f"wav_read_failed: {exc}") from exc
+        try:
+            with wave.open(tmp_wav.name, "rb") as wf:
+                sr = wf.getframerate()
+                n = wf.getnframes()
+                raw = wf.readframes(n)
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=f"wav_read_failed: {exc}") from exc
 
     if not raw:
         return {"peaks_ms": [], "duration_ms": 0}
@@ -1615,24 +3603,14 @@ def _audio_peaks_from_video_bytes(video_bytes: bytes, max_seconds: float, max_pe
     return {"peaks_ms": peaks_ms, "duration_ms": duration_ms}
 
 
-def _motion_peaks_from_video_bytes(video_bytes: bytes, max_seconds: float, max_peaks: int = 200, sample_fps: float = 10):
-    result = _process_pose_bytes(video_bytes, sample_fps, max_seconds)
+def _motion_peaks_from_pose(result: Dict[str, Any], max_peaks: int = 200, sample_fps: float = 10):
     vectors = result.get("vectors") or []
     if len(vectors) < 2:
         return {"peaks_ms": [], "frames": len(vectors), "sample_fps": sample_fps, "duration_ms": int((result.get("seconds_used") or 0) * 1000)}
 
-    energies = []
-    for i in range(1, len(vectors)):
-        prev = vectors[i - 1]
-        cur = vectors[i]
-        per_lm = []
-        for lm in range(33):
-            b = lm * 3
-            dx = cur[b] - prev[b]
-            dy = cur[b + 1] - prev[b + 1]
-            dz = cur[b + 2] - prev[b + 2]
-            per_lm.append((dx * dx + dy * dy + dz * dz) ** 0.5)
-        energies.append(sum(per_lm) / len(per_lm))
+    points = _as_sequence_array(vectors)
+    points = points.reshape(len(points), -1, 3)
+    energies = np.linalg.norm(np.diff(points, axis=0), axis=2).mean(axis=1)
 
     smoothed = _moving_average(energies, 5)
     peak_idxs = _detect_peaks(smoothed, min_distance=2, max_peaks=max_peaks)
@@ -1693,15 +3671,14 @@ async def choreo_phrase_compare(
     if not fileA.filename or not fileB.filename:
         raise HTTPException(status_code=400, detail="fileA and fileB are required")
 
-    content_a = await fileA.read()
-    content_b = await fileB.read()
-    if not content_a or not content_b:
-        raise HTTPException(status_code=400, detail="Empty fileA or fileB")
+    staged_a, staged_b = await _stage_uploads(fileA, fileB, empty_detail="Empty fileA or fileB")
 
     started = time.time()
     try:
-        result_a = _process_pose_bytes(content_a, sample_fps, max_seconds)
-        result_b = _process_pose_bytes(content_b, sample_fps, max_seconds)
+        with staged_a, staged_b:
+            result_a, result_b = await _process_pose_pair(
+                staged_a.path, staged_b.path, sample_fps, max_seconds, staged_a.sha256, staged_b.sha256
+            )
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -1716,43 +3693,9 @@ async def choreo_phrase_compare(
     fps_a = result_a.get("meta", {}).get("sample_fps") or sample_fps or 10
     fps_b = result_b.get("meta", {}).get("sample_fps") or sample_fps or 10
 
-    segs_a = _segment_from_vectors(vectors_a, fps_a)
-    segs_b = _segment_from_vectors(vectors_b, fps_b)
-
-    def pool_segment(vecs, start_sec, end_sec, fps_val):
-        start_idx = int(start_sec * fps_val)
-        end_idx = int(end_sec * fps_val)
-        clip = vecs[start_idx:end_idx] if end_idx > start_idx else []
-        return _pool_vectors(clip) if clip else []
-
-    emb_a = [pool_segment(vectors_a, s["start"], s["end"], fps_a) for s in segs_a]
-    emb_b = [pool_segment(vectors_b, s["start"], s["end"], fps_b) for s in segs_b]
-
-    matches = []
-    for seg, vec in zip(segs_a, emb_a):
-        cands = []
-        mid_a = (float(seg.get("start", 0.0)) + float(seg.get("end", 0.0))) / 2
-        for seg_b, vec_b in zip(segs_b, emb_b):
-            sim = _cosine_similarity(vec, vec_b) if vec and vec_b else 0.0
-            parts = _part_similarity(vec, vec_b) if vec and vec_b else {"upper": 0.0, "core": 0.0, "lower": 0.0}
-            sorted_parts_desc = sorted(parts.items(), key=lambda x: x[1], reverse=True)
-            dominant = [name for name, _ in sorted_parts_desc[:2]]
-            best = _PART_LABELS_JA.get(sorted_parts_desc[0][0], "上半身")
-            worst = _PART_LABELS_JA.get(sorted_parts_desc[-1][0], "下半身")
-            note = f"{best}の一致が強く、{worst}は差分あり（参考値）"
-            mid_b = (float(seg_b.get("start", 0.0)) + float(seg_b.get("end", 0.0))) / 2
-            not_similar = _not_similar_explain(parts, mid_a, mid_b)
-            cands.append(
-                {
-                    **seg_b,
-                    "similarity": sim,
-                    "parts": parts,
-                    "explain": {"dominant_parts": dominant, "note": note},
-                    "not_similar": not_similar,
-                }
-            )
-        cands_sorted = sorted(cands, key=lambda x: x["similarity"], reverse=True)[: (top_k or 3)]
-        matches.append({**seg, "candidates": cands_sorted})
+    segs_a, segs_b, matches = await _run_blocking(
+        "choreo", _segment_phrase_matches, vectors_a, fps_a, vectors_b, fps_b, top_k
+    )
 
     meta = {
         "processing_ms": duration_ms,
@@ -1766,50 +3709,175 @@ async def choreo_phrase_compare(
     }
 
 
-@app.post("/choreo/check")
-async def choreo_check(
+_reference_library: Dict[str, Dict[str, Any]] = {}
+_reference_lock = threading.Lock()
+# CHOREO_REFERENCE_DIR preload progress, reported by GET /choreo/references.
+_reference_preload: Dict[str, Any] = {"status": "idle", "pending": 0, "failed": {}}
+
+
+def _register_reference(
+    path: str,
+    reference_id: Optional[str],
+    storage_path: Optional[str],
+    sample_fps: float,
+    max_seconds: float,
+    content_hash: Optional[str] = None,
+    model_complexity: Optional[int] = None,
+):
+    content_hash = content_hash or _sha256_file(path)
+    model_complexity = _check_complexity(model_complexity)
+    result = _process_pose_file(path, sample_fps, max_seconds, content_hash, model_complexity)
+    if not result.get("features"):
+        raise HTTPException(status_code=400, detail="Pose landmarks not found in reference video")
+    # Keep only what scoring needs; landmarks and raw vectors stay in the pose cache.
+    entry = {
+        "reference_id": reference_id or content_hash,
+        "sha256": content_hash,
+        "storage_path": storage_path,
+        "sample_fps": float(sample_fps),
+        "max_seconds": float(max_seconds or 0),
+        "model_complexity": model_complexity,
+        "registered_at": time.time(),
+        "pose": {
+            "features": _pose_array(result, "features"),
+            "d_angles": _pose_array(result, "d_angles"),
+            "motion_energy": list(result.get("motion_energy") or []),
+            "feature_times": list(result.get("feature_times") or []),
+            "trim": result.get("trim"),
+            "summary": result.get("summary"),
+            "meta": result.get("meta"),
+            "seconds_used": result.get("seconds_used"),
+        },
+    }
+    with _reference_lock:
+        _reference_library[entry["reference_id"]] = entry
+    return entry
+
+
+def _get_reference(reference_id: str):
+    with _reference_lock:
+        entry = _reference_library.get(reference_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown reference_id: {reference_id}")
+    return entry
+
+
+def _reference_summary(entry: Dict[str, Any]):
+    return {
+        "reference_id": entry["reference_id"],
+        "sha256": entry["sha256"],
+        "storage_path": entry["storage_path"],
+        "sample_fps": entry["sample_fps"],
+        "max_seconds": entry["max_seconds"],
+        "model_complexity": entry["model_complexity"],
+        "frames": len(entry["pose"]["features"]),
+        "seconds_used": entry["pose"]["seconds_used"],
+    }
+
+
+async def preload_references():
+    ref_dir = os.getenv("CHOREO_REFERENCE_DIR")
+    if not ref_dir or not os.path.isdir(ref_dir):
+        return
+    names = [
+        name
+        for name in sorted(os.listdir(ref_dir))
+        if os.path.splitext(name)[1].lower() in {".mp4", ".mov", ".webm", ".mkv"}
+    ]
+    _reference_preload.update(status="running", pending=len(names), failed={})
+    for name in names:
+        try:
+            await _run_blocking(
+                "pose",
+                _register_reference,
+                os.path.join(ref_dir, name),
+                os.path.splitext(name)[0],
+                name,
+                CHOREO_TARGET_FPS,
+                30,
+            )
+        except Exception as exc:  # noqa: BLE001
+            detail = exc.detail if isinstance(exc, HTTPException) else f"{exc.__class__.__name__}: {exc}"
+            _reference_preload["failed"][name] = detail
+            logger.warning("reference preload failed for %s: %s", name, detail)
+        finally:
+            _reference_preload["pending"] -= 1
+    _reference_preload["status"] = "done"
+
+
+@app.post("/choreo/references")
+async def choreo_register_reference(
     file: UploadFile = File(...),
-    reference: UploadFile = File(...),
-    input_path: Optional[str] = Form(None),
+    reference_id: Optional[str] = Form(None),
     reference_path: Optional[str] = Form(None),
     sample_fps: float = Form(15),
     max_seconds: float = Form(30),
+    model_complexity: Optional[int] = Form(None),
 ):
-    content = await file.read()
-    ref_content = await reference.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty input file")
-    if not ref_content:
-        raise HTTPException(status_code=400, detail="Empty reference file")
+    model_complexity = _check_complexity(model_complexity)
+    staged = await _stage_upload(file, "Empty reference file")
 
-    start_ts = time.time()
-    warnings = []
-    input_hash = hashlib.sha256(content).hexdigest()
-    ref_hash = hashlib.sha256(ref_content).hexdigest()
-    if input_hash == ref_hash:
-        warnings.append("SAME_VIDEO_HASH")
-
-    target_fps = sample_fps or CHOREO_TARGET_FPS
-    pose_input = None
-    pose_ref = None
-    try:
-        pose_input = _process_pose_bytes(content, target_fps, max_seconds)
-    except Exception:  # noqa: BLE001
-        warnings.append("EXTRACT_FAILED")
+    started = time.time()
     try:
-        pose_ref = _process_pose_bytes(ref_content, target_fps, max_seconds)
-    except Exception:  # noqa: BLE001
-        warnings.append("EXTRACT_FAILED")
+        with staged:
+            entry = await _run_blocking(
+                "pose",
+                _register_reference,
+                staged.path,
+                reference_id,
+                reference_path,
+                sample_fps or CHOREO_TARGET_FPS,
+                max_seconds,
+                staged.sha256,
+                model_complexity,
+            )
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
 
-    input_meta = _build_io_meta(input_path, input_hash, pose_input)
-    ref_meta = _build_io_meta(reference_path, ref_hash, pose_ref)
+    return {**_reference_summary(entry), "processing_ms": int((time.time() - started) * 1000)}
+
+
+@app.get("/choreo/references")
+def choreo_list_references():
+    with _reference_lock:
+        entries = list(_reference_library.values())
+    return {"references": [_reference_summary(entry) for entry in entries], "preload": _reference_preload}
+
+
+@app.delete("/choreo/references/{reference_id}")
+def choreo_delete_reference(reference_id: str):
+    with _reference_lock:
+        removed = _reference_library.pop(reference_id, None)
+    if removed is None:
+        raise HTTPException(status_code=404, detail=f"Unknown reference_id: {reference_id}")
+    return {"ok": True}
 
+
+def _score_choreo_check(
+    pose_input,
+    pose_ref,
+    input_meta,
+    ref_meta,
+    warnings,
+    target_fps,
+    started,
+    dtw_mode: Optional[str] = None,
+    include_path: bool = False,
+):
+    dtw_mode = _dtw_mode(dtw_mode)
     pose_rate_input = input_meta.get("pose_success_rate") or 0.0
     pose_rate_ref = ref_meta.get("pose_success_rate") or 0.0
 
-    features_a = pose_input.get("features") if pose_input else []
-    features_b = pose_ref.get("features") if pose_ref else []
-    if not features_a or not features_b or _has_invalid_vectors(features_a) or _has_invalid_vectors(features_b):
+    features_a = _pose_array(pose_input, "features")
+    features_b = _pose_array(pose_ref, "features")
+    if (
+        not len(features_a)
+        or not len(features_b)
+        or not np.isfinite(features_a).all()
+        or not np.isfinite(features_b).all()
+    ):
         warnings.append("EXTRACT_FAILED")
     frames_input_raw = input_meta.get("frames") or 0
     frames_ref_raw = ref_meta.get("frames") or 0
@@ -1834,13 +3902,20 @@ async def choreo_check(
     overall_similarity = None
     confidence = "low"
     distance = None
+    alignment = None
     if not warnings or warnings == ["SAME_VIDEO_HASH"]:
-        seq_a = _downsample_vectors(features_a, 300)
-        seq_b = _downsample_vectors(features_b, 300)
-        if seq_a and seq_b:
+        if len(features_a) and len(features_b):
             weights = {"arms": CHOREO_WEIGHT_ARMS, "legs": CHOREO_WEIGHT_LEGS, "torso": CHOREO_WEIGHT_TORSO}
-            cost = _dtw_cost(seq_a, seq_b, 10, lambda a, b: _feature_distance(a, b, weights))
-            norm = max(len(seq_a), len(seq_b))
+            if include_path:
+                cost, len_a, len_b, path, steps = _sequence_dtw_path(
+                    features_a, features_b, "feature", weights, dtw_mode
+                )
+                alignment = _alignment_payload(
+                    path, steps, pose_input.get("feature_times"), pose_ref.get("feature_times")
+                )
+            else:
+                cost, len_a, len_b = _sequence_dtw(features_a, features_b, "feature", weights, dtw_mode)
+            norm = max(len_a, len_b)
             distance = (cost / norm) if norm > 0 else None
             if distance is not None and math.isfinite(distance):
                 overall_similarity = math.exp(-CHOREO_SIM_ALPHA * distance)
@@ -1851,11 +3926,11 @@ async def choreo_check(
 
     phrases = []
     phrase_count = 0
-    if features_a and features_b:
-        d_angles_a = pose_input.get("d_angles") if pose_input else []
-        d_angles_b = pose_ref.get("d_angles") if pose_ref else []
-        motion_energy = pose_input.get("motion_energy") if pose_input else []
-        if d_angles_a and d_angles_b and motion_energy:
+    if len(features_a) and len(features_b):
+        d_angles_a = _pose_array(pose_input, "d_angles")
+        d_angles_b = _pose_array(pose_ref, "d_angles")
+        motion_energy = list(pose_input.get("motion_energy") or [])
+        if len(d_angles_a) and len(d_angles_b) and motion_energy:
             smoothed_energy = _smooth_scalar_series(motion_energy, 5)
             mean_val, std_val = _mean_std(smoothed_energy)
             threshold = mean_val + 0.5 * std_val
@@ -1869,9 +3944,9 @@ async def choreo_check(
                         continue
                     seg_a = d_angles_a[start_idx:end_idx]
                     seg_b = d_angles_b[start_idx:end_idx]
-                    if not seg_a or not seg_b:
+                    if not len(seg_a) or not len(seg_b):
                         continue
-                    cost = _dtw_cost(seg_a, seg_b, 10, lambda a, b: _feature_distance(a, b, {"arms": 1.0, "legs": 1.0, "torso": 1.0}))
+                    cost = _dtw_cost(seg_a, seg_b, 10, "feature", {"arms": 1.0, "legs": 1.0, "torso": 1.0})
                     norm = max(len(seg_a), len(seg_b))
                     if norm <= 0:
                         continue
@@ -1889,39 +3964,35 @@ async def choreo_check(
         phrase_count = len(phrases)
 
     warnings = list(dict.fromkeys(warnings))
-    processing_ms = int((time.time() - start_ts) * 1000)
-    meta = {
-        "input": input_meta,
-        "reference": ref_meta,
-        "processing": {
-            "algorithm": "dtw-exp",
-            "processing_ms": processing_ms,
-            "warnings": warnings,
-            "distance": distance,
-            "alpha": CHOREO_SIM_ALPHA,
-            "feature": "angles+delta+smooth+trim",
-            "target_fps": target_fps,
-            "normalize": {
-                "translate": True,
-                "scale": True,
-                "rotate": CHOREO_NORMALIZE_ROTATE,
-            },
-            "trim": {
-                "input": pose_input.get("trim") if pose_input else None,
-                "reference": pose_ref.get("trim") if pose_ref else None,
-            },
-            "weights": {
-                "arms": CHOREO_WEIGHT_ARMS,
-                "legs": CHOREO_WEIGHT_LEGS,
-                "torso": CHOREO_WEIGHT_TORSO,
-                "d_angle": CHOREO_DANGLE_WEIGHT,
-            },
-            "smooth_window": CHOREO_SMOOTH_WINDOW,
-            "trim_energy_threshold": CHOREO_TRIM_ENERGY,
-            "dtw_distance_raw": distance,
-            "phrase_count": phrase_count,
-            "phrase_algorithm": "motion-energy-peak",
+    processing = {
+        "algorithm": "dtw-exp",
+        "dtw_mode": dtw_mode,
+        "processing_ms": int((time.time() - started) * 1000),
+        "warnings": warnings,
+        "distance": distance,
+        "alpha": CHOREO_SIM_ALPHA,
+        "feature": "angles+delta+smooth+trim",
+        "target_fps": target_fps,
+        "normalize": {
+            "translate": True,
+            "scale": True,
+            "rotate": CHOREO_NORMALIZE_ROTATE,
         },
+        "trim": {
+            "input": pose_input.get("trim") if pose_input else None,
+            "reference": pose_ref.get("trim") if pose_ref else None,
+        },
+        "weights": {
+            "arms": CHOREO_WEIGHT_ARMS,
+            "legs": CHOREO_WEIGHT_LEGS,
+            "torso": CHOREO_WEIGHT_TORSO,
+            "d_angle": CHOREO_DANGLE_WEIGHT,
+        },
+        "smooth_window": CHOREO_SMOOTH_WINDOW,
+        "trim_energy_threshold": CHOREO_TRIM_ENERGY,
+        "dtw_distance_raw": distance,
+        "phrase_count": phrase_count,
+        "phrase_algorithm": "motion-energy-peak",
     }
 
     explanation = {
@@ -1934,12 +4005,250 @@ async def choreo_check(
             "different_reason": "全身が映る動画/明るい環境で再試行してください",
         }
 
-    return {
+    result = {
         "overall_similarity": overall_similarity,
         "confidence": confidence,
         "explanation": explanation,
         "phrases": phrases,
-        "meta": meta,
+        "meta": {
+            "input": input_meta,
+            "reference": ref_meta,
+            "processing": processing,
+        },
+    }
+    if include_path:
+        result["alignment"] = alignment
+    return result
+
+
+def _reference_params_warnings(
+    entry: Dict[str, Any], target_fps: float, max_seconds: float, model_complexity: int
+):
+    if (
+        entry["sample_fps"] != float(target_fps)
+        or entry["max_seconds"] != float(max_seconds or 0)
+        or entry["model_complexity"] != model_complexity
+    ):
+        return ["REFERENCE_PARAMS_MISMATCH"]
+    return []
+
+
+@app.post("/choreo/check")
+async def choreo_check(
+    file: UploadFile = File(...),
+    reference: Optional[UploadFile] = File(None),
+    input_path: Optional[str] = Form(None),
+    reference_path: Optional[str] = Form(None),
+    reference_id: Optional[str] = Form(None),
+    sample_fps: float = Form(15),
+    max_seconds: float = Form(30),
+    model_complexity: Optional[int] = Form(None),
+    dtw_mode: Optional[str] = Form(None),
+    include_path: bool = Form(False),
+):
+    model_complexity = _check_complexity(model_complexity)
+    dtw_mode = _dtw_mode(dtw_mode)
+    staged, staged_ref, entry = await _stage_check_uploads(file, reference, reference_id)
+    try:
+        return await _choreo_check_files(
+            staged,
+            staged_ref,
+            entry,
+            input_path,
+            reference_path,
+            sample_fps,
+            max_seconds,
+            model_complexity,
+            dtw_mode,
+            include_path,
+        )
+    finally:
+        _discard_staged(staged, staged_ref)
+
+
+async def _stage_check_uploads(
+    file: UploadFile, reference: Optional[UploadFile], reference_id: Optional[str]
+):
+    if reference is None and not reference_id:
+        raise HTTPException(status_code=400, detail="reference or reference_id is required")
+    entry = _get_reference(reference_id) if reference is None else None
+
+    staged = await _stage_upload(file, "Empty input file")
+    staged_ref = None
+    if reference is not None:
+        try:
+            staged_ref = await _stage_upload(reference, "Empty reference file")
+        except BaseException:
+            staged.discard()
+            raise
+    return staged, staged_ref, entry
+
+
+def _discard_staged(*staged: Optional[_StagedUpload]):
+    for item in staged:
+        if item is not None:
+            item.discard()
+
+
+async def _choreo_check_files(
+    staged: _StagedUpload,
+    staged_ref: Optional[_StagedUpload],
+    entry: Optional[Dict[str, Any]],
+    input_path: Optional[str],
+    reference_path: Optional[str],
+    sample_fps: float,
+    max_seconds: float,
+    model_complexity: int,
+    dtw_mode: Optional[str] = None,
+    include_path: bool = False,
+):
+    start_ts = time.time()
+    warnings = []
+    input_hash = staged.sha256
+    ref_hash = staged_ref.sha256 if staged_ref is not None else entry["sha256"]
+    if input_hash == ref_hash:
+        warnings.append("SAME_VIDEO_HASH")
+
+    target_fps = sample_fps or CHOREO_TARGET_FPS
+    pose_input = None
+    pose_ref = None
+    if entry is not None:
+        try:
+            pose_input = await _process_pose_file_async(
+                staged.path, target_fps, max_seconds, input_hash, model_complexity
+            )
+        except Exception:  # noqa: BLE001
+            warnings.append("EXTRACT_FAILED")
+        pose_ref = entry["pose"]
+        warnings.extend(_reference_params_warnings(entry, target_fps, max_seconds, model_complexity))
+    else:
+        pose_input, pose_ref = await _process_pose_pair(
+            staged.path,
+            staged_ref.path,
+            target_fps,
+            max_seconds,
+            input_hash,
+            ref_hash,
+            return_exceptions=True,
+            model_complexity=model_complexity,
+        )
+        if isinstance(pose_input, Exception):
+            pose_input = None
+            warnings.append("EXTRACT_FAILED")
+        if isinstance(pose_ref, Exception):
+            pose_ref = None
+            warnings.append("EXTRACT_FAILED")
+
+    input_meta = _build_io_meta(input_path, input_hash, pose_input)
+    ref_meta = _build_io_meta(
+        reference_path or (entry["storage_path"] if entry else None), ref_hash, pose_ref
+    )
+    if entry is not None:
+        ref_meta["reference_id"] = entry["reference_id"]
+
+    return await _run_blocking(
+        "choreo",
+        _score_choreo_check,
+        pose_input,
+        pose_ref,
+        input_meta,
+        ref_meta,
+        warnings,
+        target_fps,
+        start_ts,
+        dtw_mode,
+        include_path,
+    )
+
+
+@app.post("/choreo/check_batch")
+async def choreo_check_batch(
+    file: UploadFile = File(...),
+    reference_ids: str = Form(...),
+    input_path: Optional[str] = Form(None),
+    sample_fps: float = Form(15),
+    max_seconds: float = Form(30),
+    model_complexity: Optional[int] = Form(None),
+    top_k: Optional[int] = Form(None),
+    dtw_mode: Optional[str] = Form(None),
+):
+    model_complexity = _check_complexity(model_complexity)
+    dtw_mode = _dtw_mode(dtw_mode)
+    ids = [item.strip() for item in reference_ids.split(",") if item.strip()]
+    if not ids:
+        raise HTTPException(status_code=400, detail="reference_ids is required")
+    entries = [_get_reference(ref_id) for ref_id in ids]
+
+    staged = await _stage_upload(file, "Empty input file")
+
+    start_ts = time.time()
+    input_hash = staged.sha256
+    target_fps = sample_fps or CHOREO_TARGET_FPS
+    pose_input = None
+    input_warnings = []
+    try:
+        with staged:
+            pose_input = await _process_pose_file_async(
+                staged.path, target_fps, max_seconds, input_hash, model_complexity
+            )
+    except Exception:  # noqa: BLE001
+        input_warnings.append("EXTRACT_FAILED")
+    input_meta = _build_io_meta(input_path, input_hash, pose_input)
+
+    # With top_k, rank references by the same DTW distance the overall score uses
+    # and only run the full scoring (phrases etc.) for the best k. The pruned search
+    # works on downsampled sequences, so multires mode scores everything and cuts after.
+    search = None
+    features_input = _pose_array(pose_input, "features")
+    if top_k and dtw_mode == "downsample" and len(features_input) and np.isfinite(features_input).all():
+        candidates = []
+        for entry in entries:
+            features_ref = entry["pose"]["features"]
+            usable = len(features_ref) and np.isfinite(features_ref).all()
+            candidates.append(_downsample_vectors(features_ref, 300) if usable else [])
+        weights = {"arms": CHOREO_WEIGHT_ARMS, "legs": CHOREO_WEIGHT_LEGS, "torso": CHOREO_WEIGHT_TORSO}
+        ranked, search = await _run_blocking(
+            "choreo", _dtw_search, _downsample_vectors(features_input, 300), candidates, top_k, 10, "feature", weights
+        )
+        entries = [entries[index] for index, _ in ranked]
+
+    async def score(entry):
+        warnings = list(input_warnings)
+        if input_hash == entry["sha256"]:
+            warnings.append("SAME_VIDEO_HASH")
+        warnings.extend(_reference_params_warnings(entry, target_fps, max_seconds, model_complexity))
+        ref_meta = _build_io_meta(entry["storage_path"], entry["sha256"], entry["pose"])
+        ref_meta["reference_id"] = entry["reference_id"]
+        scored = await _run_blocking(
+            "choreo",
+            _score_choreo_check,
+            pose_input,
+            entry["pose"],
+            input_meta,
+            ref_meta,
+            warnings,
+            target_fps,
+            start_ts,
+            dtw_mode,
+        )
+        return {"reference_id": entry["reference_id"], **scored}
+
+    results = list(await asyncio.gather(*(score(entry) for entry in entries)))
+    if top_k and search is None:
+        results.sort(
+            key=lambda item: -1.0 if item["overall_similarity"] is None else item["overall_similarity"],
+            reverse=True,
+        )
+        results = results[:top_k]
+
+    return {
+        "results": results,
+        "meta": {
+            "input": input_meta,
+            "references": len(results),
+            "search": search,
+            "processing_ms": int((time.time() - start_ts) * 1000),
+        },
     }
 
 
@@ -1953,9 +4262,12 @@ async def choreo_compute(payload: Dict[str, Any] = Body(...)):
 
     if mode not in {"compare", "compare_dtw", "segment", "phrase_compare"}:
         raise HTTPException(status_code=400, detail="Invalid mode")
+    dtw_mode = _dtw_mode(payload.get("dtw_mode"))
 
-    pose_a = _load_pose_json(poseA_url) if poseA_url else None
-    pose_b = _load_pose_json(poseB_url) if poseB_url else None
+    async def fetch(url):
+        return await _run_blocking("media", _load_pose_json, url) if url else None
+
+    pose_a, pose_b = await asyncio.gather(fetch(poseA_url), fetch(poseB_url))
 
     start_ts = time.time()
     try:
@@ -1969,9 +4281,7 @@ async def choreo_compute(payload: Dict[str, Any] = Body(...)):
             raise HTTPException(status_code=400, detail="Pose vectors missing")
 
         if mode == "compare":
-            vec_a = _pool_vectors(vectors_a)
-            vec_b = _pool_vectors(vectors_b)
-            similarity = _cosine_similarity(vec_a, vec_b) if vec_a and vec_b else 0.0
+            similarity = await _run_blocking("choreo", _pooled_similarity, vectors_a, vectors_b)
             meta = {
                 "processing_ms": int((time.time() - start_ts) * 1000),
                 "framesA": len(vectors_a),
@@ -1980,23 +4290,24 @@ async def choreo_compute(payload: Dict[str, Any] = Body(...)):
             return {"meta": meta, "similarity": similarity}
 
         if mode == "compare_dtw":
-            seq_a = _downsample_vectors(vectors_a, 300)
-            seq_b = _downsample_vectors(vectors_b, 300)
-            cost = _dtw_cost(seq_a, seq_b, band)
-            norm = max(len(seq_a), len(seq_b))
+            cost, frames_a, frames_b = await _run_blocking(
+                "choreo", _sequence_dtw, vectors_a, vectors_b, mode=dtw_mode, band=band
+            )
+            norm = max(frames_a, frames_b)
             similarity = math.exp(-cost / norm) if norm > 0 else 0.0
             similarity = max(0.0, min(1.0, similarity))
             meta = {
                 "processing_ms": int((time.time() - start_ts) * 1000),
-                "framesA": len(seq_a),
-                "framesB": len(seq_b),
+                "framesA": frames_a,
+                "framesB": frames_b,
                 "band": band,
+                "dtw_mode": dtw_mode,
             }
             return {"meta": meta, "similarity": similarity, "dtw_cost": cost}
 
         if mode == "segment":
             fps_a = pose_a.get("meta", {}).get("sample_fps") or 10
-            segments, energy = _segment_with_energy(vectors_a, fps_a)
+            segments, energy = await _run_blocking("choreo", _segment_with_energy, vectors_a, fps_a)
             meta = {
                 "processing_ms": int((time.time() - start_ts) * 1000),
                 "frames": len(vectors_a),
@@ -2012,43 +4323,9 @@ async def choreo_compute(payload: Dict[str, Any] = Body(...)):
         if mode == "phrase_compare":
             fps_a = pose_a.get("meta", {}).get("sample_fps") or 10
             fps_b = pose_b.get("meta", {}).get("sample_fps") or 10
-            segs_a = _segment_from_vectors(vectors_a, fps_a)
-            segs_b = _segment_from_vectors(vectors_b, fps_b)
-
-            def pool_segment(vecs, start_sec, end_sec, fps_val):
-                start_idx = int(start_sec * fps_val)
-                end_idx = int(end_sec * fps_val)
-                clip = vecs[start_idx:end_idx] if end_idx > start_idx else []
-                return _pool_vectors(clip) if clip else []
-
-            emb_a = [pool_segment(vectors_a, s["start"], s["end"], fps_a) for s in segs_a]
-            emb_b = [pool_segment(vectors_b, s["start"], s["end"], fps_b) for s in segs_b]
-
-            matches = []
-            for seg, vec in zip(segs_a, emb_a):
-                cands = []
-                mid_a = (float(seg.get("start", 0.0)) + float(seg.get("end", 0.0))) / 2
-                for seg_b, vec_b in zip(segs_b, emb_b):
-                    sim = _cosine_similarity(vec, vec_b) if vec and vec_b else 0.0
-                    parts = _part_similarity(vec, vec_b) if vec and vec_b else {"upper": 0.0, "core": 0.0, "lower": 0.0}
-                    sorted_parts = sorted(parts.items(), key=lambda x: x[1], reverse=True)
-                    dominant = [name for name, _ in sorted_parts[:2]]
-                    best = _PART_LABELS_JA.get(sorted_parts[0][0], "上半身")
-                    worst = _PART_LABELS_JA.get(sorted_parts[-1][0], "下半身")
-                    note = f"{best}の一致が強く、{worst}は差分あり（参考値）"
-                    mid_b = (float(seg_b.get("start", 0.0)) + float(seg_b.get("end", 0.0))) / 2
-                    not_similar = _not_similar_explain(parts, mid_a, mid_b)
-                    cands.append(
-                        {
-                            **seg_b,
-                            "similarity": sim,
-                            "parts": parts,
-                            "explain": {"dominant_parts": dominant, "note": note},
-                            "not_similar": not_similar,
-                        }
-                    )
-                cands_sorted = sorted(cands, key=lambda x: x["similarity"], reverse=True)[: (top_k or 3)]
-                matches.append({**seg, "candidates": cands_sorted})
+            segs_a, segs_b, matches = await _run_blocking(
+                "choreo", _segment_phrase_matches, vectors_a, fps_a, vectors_b, fps_b, top_k
+            )
 
             meta = {
                 "processing_ms": int((time.time() - start_ts) * 1000),
@@ -2062,6 +4339,255 @@ async def choreo_compute(payload: Dict[str, Any] = Body(...)):
         raise HTTPException(status_code=500, detail=f"{exc.__class__.__name__}: {exc}") from exc
 
 
+_jobs: Dict[str, Dict[str, Any]] = {}
+_job_queue: List[Any] = []
+_job_running: Dict[str, int] = {}
+_job_seq = 0
+
+
+def _job_view(job: Dict[str, Any]):
+    view = {
+        key: job[key]
+        for key in ("id", "type", "priority", "status", "created_at", "started_at", "finished_at")
+    }
+    if job["status"] == "queued":
+        view["queue_position"] = next(
+            (pos for pos, (_, _, job_id) in enumerate(sorted(_job_queue)) if job_id == job["id"]), None
+        )
+    if job["status"] == "succeeded":
+        view["result"] = job["result"]
+    if job["error"] is not None:
+        view["error"] = job["error"]
+    return view
+
+
+def _job_changed(job: Dict[str, Any]):
+    job["changed"].set()
+    job["changed"] = asyncio.Event()
+
+
+def _finish_job(job: Dict[str, Any]):
+    job["finished_at"] = time.time()
+    job["factory"] = None
+    job["task"] = None
+    if job["cleanup"] is not None:
+        job["cleanup"]()
+        job["cleanup"] = None
+    _job_changed(job)
+
+
+def _prune_jobs():
+    cutoff = time.time() - JOB_RESULT_TTL
+    for job_id in [
+        job_id
+        for job_id, job in _jobs.items()
+        if job["finished_at"] is not None and job["finished_at"] < cutoff
+    ]:
+        del _jobs[job_id]
+
+
+def _submit_job(job_type: str, priority: str, factory, cleanup=None):
+    global _job_seq
+    if priority not in JOB_PRIORITIES or len(_job_queue) >= JOB_QUEUE_MAX:
+        if cleanup is not None:
+            cleanup()
+        if priority not in JOB_PRIORITIES:
+            raise HTTPException(status_code=400, detail="priority must be interactive or batch")
+        raise HTTPException(status_code=429, detail="Job queue is full")
+    _prune_jobs()
+
+    _job_seq += 1
+    job = {
+        "id": uuid.uuid4().hex,
+        "type": job_type,
+        "priority": priority,
+        "status": "queued",
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+        "factory": factory,
+        "cleanup": cleanup,
+        "task": None,
+        "changed": asyncio.Event(),
+    }
+    _jobs[job["id"]] = job
+    heapq.heappush(_job_queue, (JOB_PRIORITIES[priority], _job_seq, job["id"]))
+    _dispatch_jobs()
+    return job
+
+
+def _dispatch_jobs():
+    # Highest priority first; a job whose type is at its concurrency limit
+    # stays queued without blocking other job types behind it.
+    waiting = []
+    while _job_queue:
+        item = heapq.heappop(_job_queue)
+        job = _jobs.get(item[2])
+        if job is None or job["status"] != "queued":
+            continue
+        if _job_running.get(job["type"], 0) >= JOB_CONCURRENCY.get(job["type"], 1):
+            waiting.append(item)
+            continue
+        _job_running[job["type"]] = _job_running.get(job["type"], 0) + 1
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        job["task"] = asyncio.create_task(_run_job(job))
+        _job_changed(job)
+    for item in waiting:
+        heapq.heappush(_job_queue, item)
+
+
+async def _run_job(job: Dict[str, Any]):
+    # A job cancelled while running keeps its slot and staged files until the
+    # work returns here; whatever it produced is then dropped.
+    try:
+        result = await job["factory"]()
+        if job["status"] == "running":
+            job["result"] = result
+            job["status"] = "succeeded"
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+    except HTTPException as exc:
+        if job["status"] == "running":
+            job["status"] = "failed"
+            job["error"] = {"status_code": exc.status_code, "detail": exc.detail}
+    except Exception as exc:  # noqa: BLE001
+        if job["status"] == "running":
+            job["status"] = "failed"
+            job["error"] = {"status_code": 500, "detail": f"{exc.__class__.__name__}: {exc}"}
+    finally:
+        _job_running[job["type"]] -= 1
+        _finish_job(job)
+        _dispatch_jobs()
+
+
+def _get_job(job_id: str):
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+@app.post("/jobs/asr_diarize")
+async def submit_asr_diarize_job(
+    file: UploadFile = File(...),
+    language: str = Form("auto"),
+    split_words: bool = Form(False),
+    vad: Optional[str] = Form(None),
+    priority: str = Form("interactive"),
+):
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="File is required")
+    _check_vad(vad)
+    # The job owns the staged file from here on and removes it when it finishes.
+    staged = await _stage_upload(file)
+    job = _submit_job(
+        "asr_diarize",
+        priority,
+        lambda: _asr_diarize_file(staged.path, language, split_words, vad),
+        staged.discard,
+    )
+    return _job_view(job)
+
+
+@app.post("/jobs/choreo/check")
+async def submit_choreo_check_job(
+    file: UploadFile = File(...),
+    reference: Optional[UploadFile] = File(None),
+    input_path: Optional[str] = Form(None),
+    reference_path: Optional[str] = Form(None),
+    reference_id: Optional[str] = Form(None),
+    sample_fps: float = Form(15),
+    max_seconds: float = Form(30),
+    model_complexity: Optional[int] = Form(None),
+    dtw_mode: Optional[str] = Form(None),
+    include_path: bool = Form(False),
+    priority: str = Form("interactive"),
+):
+    model_complexity = _check_complexity(model_complexity)
+    dtw_mode = _dtw_mode(dtw_mode)
+    staged, staged_ref, entry = await _stage_check_uploads(file, reference, reference_id)
+    job = _submit_job(
+        "choreo_check",
+        priority,
+        lambda: _choreo_check_files(
+            staged,
+            staged_ref,
+            entry,
+            input_path,
+            reference_path,
+            sample_fps,
+            max_seconds,
+            model_complexity,
+            dtw_mode,
+            include_path,
+        ),
+        lambda: _discard_staged(staged, staged_ref),
+    )
+    return _job_view(job)
+
+
+@app.post("/jobs/multimodal/compare")
+async def submit_multimodal_compare_job(
+    fileA: UploadFile = File(...),
+    fileB: UploadFile = File(...),
+    max_seconds: float = Form(60),
+    priority: str = Form("interactive"),
+):
+    if not fileA.filename or not fileB.filename:
+        raise HTTPException(status_code=400, detail="fileA and fileB are required")
+    staged_a, staged_b = await _stage_uploads(fileA, fileB, empty_detail="Empty fileA or fileB")
+    job = _submit_job(
+        "multimodal_compare",
+        priority,
+        lambda: _multimodal_compare_files(staged_a, staged_b, max_seconds),
+        lambda: _discard_staged(staged_a, staged_b),
+    )
+    return _job_view(job)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _job_view(_get_job(job_id))
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    job = _get_job(job_id)
+
+    async def events():
+        while True:
+            changed = job["changed"]
+            view = _job_view(job)
+            yield f"event: status\ndata: {json.dumps(view)}\n\n"
+            if job["finished_at"] is not None:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    if job["status"] == "queued":
+        _job_queue[:] = [item for item in _job_queue if item[2] != job_id]
+        heapq.heapify(_job_queue)
+        job["status"] = "cancelled"
+        _finish_job(job)
+    elif job["status"] == "running":
+        # Executor work can't be interrupted, so only mark the job; _run_job
+        # frees its slot and staged files once that work returns.
+        job["status"] = "cancelled"
+        _job_changed(job)
+    return _job_view(job)
+
+
 @app.post("/multimodal/align")
 async def multimodal_align(
     file: UploadFile = File(...),
@@ -2070,17 +4596,19 @@ async def multimodal_align(
     if not file.filename:
         raise HTTPException(status_code=400, detail="File is required")
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
+    staged = await _stage_upload(file)
 
     max_seconds = float(max_seconds) if max_seconds and max_seconds > 0 else 60.0
     tolerance_ms = 150
 
     started = time.time()
     try:
-        audio = _audio_peaks_from_video_bytes(content, max_seconds, 200)
-        motion = _motion_peaks_from_video_bytes(content, max_seconds, 200, 10)
+        with staged:
+            audio, pose = await asyncio.gather(
+                _run_blocking("media", _audio_peaks_from_video, staged.path, max_seconds, 200),
+                _process_pose_file_async(staged.path, 10, max_seconds, staged.sha256),
+            )
+        motion = _motion_peaks_from_pose(pose, 200, 10)
         lag_ms = _mode_lag_ms(audio["peaks_ms"], motion["peaks_ms"])
         sync_score = _match_rate(audio["peaks_ms"], motion["peaks_ms"], tolerance_ms, lag_ms)
     except HTTPException:
@@ -2116,23 +4644,27 @@ async def multimodal_compare(
     if not fileA.filename or not fileB.filename:
         raise HTTPException(status_code=400, detail="fileA and fileB are required")
 
-    content_a = await fileA.read()
-    content_b = await fileB.read()
-    if not content_a or not content_b:
-        raise HTTPException(status_code=400, detail="Empty fileA or fileB")
+    staged_a, staged_b = await _stage_uploads(fileA, fileB, empty_detail="Empty fileA or fileB")
+    with staged_a, staged_b:
+        return await _multimodal_compare_files(staged_a, staged_b, max_seconds)
+
 
+async def _multimodal_compare_files(staged_a: _StagedUpload, staged_b: _StagedUpload, max_seconds: float):
     max_seconds = float(max_seconds) if max_seconds and max_seconds > 0 else 60.0
     tolerance_ms = 150
 
     started = time.time()
     try:
-        audio_a = _audio_peaks_from_video_bytes(content_a, max_seconds, 200)
-        motion_a = _motion_peaks_from_video_bytes(content_a, max_seconds, 200, 10)
+        (pose_a, pose_b), audio_a, audio_b = await asyncio.gather(
+            _process_pose_pair(staged_a.path, staged_b.path, 10, max_seconds, staged_a.sha256, staged_b.sha256),
+            _run_blocking("media", _audio_peaks_from_video, staged_a.path, max_seconds, 200),
+            _run_blocking("media", _audio_peaks_from_video, staged_b.path, max_seconds, 200),
+        )
+        motion_a = _motion_peaks_from_pose(pose_a, 200, 10)
         lag_a = _mode_lag_ms(audio_a["peaks_ms"], motion_a["peaks_ms"])
         sync_a = _match_rate(audio_a["peaks_ms"], motion_a["peaks_ms"], tolerance_ms, lag_a)
 
-        audio_b = _audio_peaks_from_video_bytes(content_b, max_seconds, 200)
-        motion_b = _motion_peaks_from_video_bytes(content_b, max_seconds, 200, 10)
+        motion_b = _motion_peaks_from_pose(pose_b, 200, 10)
         lag_b = _mode_lag_ms(audio_b["peaks_ms"], motion_b["peaks_ms"])
         sync_b = _match_rate(audio_b["peaks_ms"], motion_b["peaks_ms"], tolerance_ms, lag_b)
     except HTTPException:
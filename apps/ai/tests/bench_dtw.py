@@ -0,0 +1,53 @@
+"""Time the original per-cell DTW loop against main._dtw_cost.
+
+Run from apps/ai: python tests/bench_dtw.py [--frames 300] [--band 10] [--repeat 5]
+"""
+import argparse
+import math
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import main  # noqa: E402
+from test_dtw import _reference_dtw  # noqa: E402
+
+
+def _sequence(rng, length, dim):
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(length)]
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--band", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    weights = {"arms": 1.2, "legs": 0.8, "torso": 1.0}
+    print(f"{args.frames}x{args.frames}, band {args.band}, best of {args.repeat}")
+    for metric, dim in (("feature", 10), ("cosine", 99)):
+        seq_a = _sequence(rng, args.frames, dim)
+        seq_b = _sequence(rng, args.frames, dim)
+        reference = _reference_dtw(seq_a, seq_b, args.band, metric, weights)
+        vectorised = main._dtw_cost(seq_a, seq_b, args.band, metric, weights)
+        assert math.isclose(reference, vectorised, rel_tol=1e-9, abs_tol=1e-9), (reference, vectorised)
+
+        loop_s = min(
+            timeit.repeat(lambda: _reference_dtw(seq_a, seq_b, args.band, metric, weights), number=1, repeat=args.repeat)
+        )
+        numpy_s = min(
+            timeit.repeat(lambda: main._dtw_cost(seq_a, seq_b, args.band, metric, weights), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{metric:>8} ({dim:>2} dims): loop {loop_s * 1000:7.1f} ms"
+            f"  numpy {numpy_s * 1000:6.1f} ms  x{loop_s / numpy_s:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main_bench()
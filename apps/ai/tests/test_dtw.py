@@ -0,0 +1,130 @@
+import math
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+main = pytest.importorskip("main")
+
+
+def _cosine_distance(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0 or norm_b == 0:
+        return 1.0
+    return 1 - dot / (norm_a * norm_b)
+
+
+def _feature_distance(a, b, weights):
+    if len(a) != len(b):
+        return math.inf
+    weight_map = [weights.get(part, 1.0) for part in ("arms", "arms", "legs", "legs", "torso") * 2]
+    total = 0.0
+    for idx, (x, y) in enumerate(zip(a, b)):
+        w = weight_map[idx] if idx < len(weight_map) else 1.0
+        total += ((x - y) * w) ** 2
+    return math.sqrt(total)
+
+
+def _reference_dtw(seq_a, seq_b, band, metric="cosine", weights=None):
+    """The original per-cell O(nm) loop."""
+    len_a, len_b = len(seq_a), len(seq_b)
+    if len_a == 0 or len_b == 0:
+        return math.inf
+    band = max(band, abs(len_a - len_b))
+    prev = [math.inf] * (len_b + 1)
+    prev[0] = 0.0
+    for i in range(1, len_a + 1):
+        curr = [math.inf] * (len_b + 1)
+        for j in range(max(1, i - band), min(len_b, i + band) + 1):
+            if metric == "feature":
+                dist = _feature_distance(seq_a[i - 1], seq_b[j - 1], weights or {})
+            else:
+                dist = _cosine_distance(seq_a[i - 1], seq_b[j - 1])
+            curr[j] = dist + min(prev[j], curr[j - 1], prev[j - 1])
+        prev = curr
+    return prev[len_b]
+
+
+def _sequence(rng, length, dim):
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(length)]
+
+
+def _assert_same(actual, expected):
+    if math.isinf(expected):
+        assert math.isinf(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "feature"])
+@pytest.mark.parametrize("len_a,len_b,band", [(1, 1, 0), (7, 7, 2), (12, 5, 3), (5, 19, 10), (30, 24, 4)])
+def test_dtw_cost_matches_reference_loop(metric, len_a, len_b, band):
+    rng = random.Random(len_a * 100 + len_b)
+    seq_a = _sequence(rng, len_a, 10)
+    seq_b = _sequence(rng, len_b, 10)
+    weights = {"arms": 1.5, "legs": 0.5}
+    _assert_same(
+        main._dtw_cost(seq_a, seq_b, band, metric, weights),
+        _reference_dtw(seq_a, seq_b, band, metric, weights),
+    )
+
+
+def test_dtw_cost_cosine_ragged_matches_reference_loop():
+    rng = random.Random(7)
+    seq_a = [[rng.uniform(-1, 1) for _ in range(rng.choice([3, 4, 6]))] for _ in range(9)]
+    seq_b = [[rng.uniform(-1, 1) for _ in range(rng.choice([4, 5]))] for _ in range(11)]
+    seq_a[2] = [0.0, 0.0, 0.0]
+    _assert_same(main._dtw_cost(seq_a, seq_b, 3), _reference_dtw(seq_a, seq_b, 3))
+
+
+def test_dtw_cost_feature_mixed_lengths_is_inf():
+    rng = random.Random(11)
+    seq_a = _sequence(rng, 6, 10)
+    seq_a[3] = seq_a[3][:8]
+    seq_b = _sequence(rng, 6, 10)
+    assert math.isinf(_reference_dtw(seq_a, seq_b, 2, "feature"))
+    assert math.isinf(main._dtw_cost(seq_a, seq_b, 2, "feature"))
+    assert math.isinf(main._dtw_cost(_sequence(rng, 6, 8), seq_b, 2, "feature"))
+    cost, path, steps = main._dtw_path(seq_a, seq_b, 2, "feature")
+    assert math.isinf(cost) and path == [] and steps == []
+    for mode in main.DTW_MODES:
+        assert math.isinf(main._sequence_dtw(seq_a, seq_b, "feature", mode=mode)[0])
+
+
+@pytest.mark.parametrize("seq_a,seq_b", [([], []), ([], [[1.0, 2.0]]), ([[1.0, 2.0]], [])])
+def test_dtw_empty_inputs_are_inf(seq_a, seq_b):
+    for metric in ("cosine", "feature"):
+        assert math.isinf(main._dtw_cost(seq_a, seq_b, 10, metric))
+        assert math.isinf(main._dtw_path(seq_a, seq_b, 10, metric)[0])
+        for mode in main.DTW_MODES:
+            assert math.isinf(main._sequence_dtw(seq_a, seq_b, metric, mode=mode)[0])
+
+
+def test_dtw_path_cost_matches_reference_loop():
+    rng = random.Random(3)
+    seq_a = _sequence(rng, 14, 6)
+    seq_b = _sequence(rng, 10, 6)
+    cost, path, steps = main._dtw_path(seq_a, seq_b, 4)
+    _assert_same(cost, _reference_dtw(seq_a, seq_b, 4))
+    assert path[0] == (0, 0) and path[-1] == (13, 9)
+    assert sum(steps) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "feature"])
+def test_dtw_search_matches_brute_force(metric):
+    rng = random.Random(5)
+    query = _sequence(rng, 12, 10)
+    candidates = [_sequence(rng, rng.randint(6, 18), 10) for _ in range(15)]
+    candidates[4] = []
+    candidates[9][2] = candidates[9][2][:7]
+    costs = [_reference_dtw(query, cand, 5, metric) for cand in candidates]
+    scores = [cost / max(len(query), len(cand), 1) for cost, cand in zip(costs, candidates)]
+    expected = sorted(range(len(candidates)), key=lambda index: (scores[index], index))[:5]
+    ranked, _ = main._dtw_search(query, candidates, 5, 5, metric)
+    assert [index for index, _ in ranked] == expected
+    for index, cost in ranked:
+        _assert_same(cost, costs[index])
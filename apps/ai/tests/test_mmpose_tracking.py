@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+main = pytest.importorskip("main")
+
+
+def _frame_id(image):
+    return int(image[0, 0, 0])
+
+
+def _detector_box(frame):
+    return np.array([10.0 + frame, 10.0, 60.0 + frame, 90.0], dtype=np.float32)
+
+
+class _Models:
+    """Stub detector/pose: keypoints drift 2px right of the box each frame."""
+
+    def __init__(self, weak=()):
+        self.weak = set(weak)
+        self.detect_calls = []
+        self.boxes = {}
+
+    def detect(self, det_model, images):
+        self.detect_calls.append([_frame_id(image) for image in images])
+        return [_detector_box(_frame_id(image)) for image in images]
+
+    def topdown(self, pose_model, images, boxes):
+        poses = []
+        for image, bbox in zip(images, boxes):
+            frame = _frame_id(image)
+            self.boxes[frame] = None if bbox is None else np.asarray(bbox).copy()
+            if bbox is None:
+                poses.append(None)
+                continue
+            x1, y1, x2, y2 = bbox
+            keypoints = np.array([[x1 + 2, y1], [x2 + 2, y1], [x1 + 2, y2], [x2 + 2, y2]])
+            fitted = not np.allclose(bbox, _detector_box(frame))
+            score = 0.1 if frame in self.weak and fitted else 0.9
+            poses.append((keypoints, np.full(4, score)))
+        return poses
+
+
+@pytest.fixture
+def models(monkeypatch):
+    def install(weak=()):
+        stub = _Models(weak)
+        monkeypatch.setattr(main, "_mmpose_detect", stub.detect)
+        monkeypatch.setattr(main, "_mmpose_topdown", stub.topdown)
+        monkeypatch.setattr(main, "MMPOSE_DETECT_INTERVAL", 4)
+        monkeypatch.setattr(main, "MMPOSE_TRACK_MIN_SCORE", 0.5)
+        monkeypatch.setattr(main, "MMPOSE_TRACK_PADDING", 1.0)
+        return stub
+
+    return install
+
+
+def _images(first, count):
+    images = []
+    for frame in range(first, first + count):
+        image = np.zeros((120, 200, 3), dtype=np.uint8)
+        image[0, 0, 0] = frame
+        images.append(image)
+    return images
+
+
+def _fitted(previous_box):
+    x1, y1, x2, y2 = previous_box
+    keypoints = np.array([[x1 + 2, y1], [x2 + 2, y1], [x1 + 2, y2], [x2 + 2, y2]])
+    return main._bbox_from_keypoints(keypoints, np.full(4, 0.9), 200, 120)
+
+
+def test_tracked_frames_use_previous_frame_keypoints(models):
+    stub = models()
+    track = {"frame": 0, "bbox": None, "detected": 0}
+    landmarks = main._mmpose_infer_batch(None, None, _images(0, 8), track)
+
+    assert all(landmarks)
+    assert stub.detect_calls == [[0, 4]]
+    assert track == {"frame": 8, "bbox": track["bbox"], "detected": 2}
+    for frame in (0, 4):
+        np.testing.assert_allclose(stub.boxes[frame], _detector_box(frame))
+    for frame in (1, 2, 3, 5, 6, 7):
+        np.testing.assert_allclose(stub.boxes[frame], _fitted(stub.boxes[frame - 1]))
+    np.testing.assert_allclose(track["bbox"], _fitted(stub.boxes[7]))
+
+
+def test_next_batch_starts_from_last_keypoints(models):
+    stub = models()
+    track = {"frame": 0, "bbox": None, "detected": 0}
+    main._mmpose_infer_batch(None, None, _images(0, 6), track)
+    carried = track["bbox"].copy()
+    main._mmpose_infer_batch(None, None, _images(6, 4), track)
+
+    assert stub.detect_calls == [[0, 4], [8]]
+    np.testing.assert_allclose(stub.boxes[6], carried)
+    np.testing.assert_allclose(stub.boxes[7], _fitted(stub.boxes[6]))
+    assert track["detected"] == 3
+
+
+def test_retry_box_is_carried_forward(models):
+    stub = models(weak={5})
+    track = {"frame": 0, "bbox": None, "detected": 0}
+    main._mmpose_infer_batch(None, None, _images(0, 8), track)
+
+    assert stub.detect_calls == [[0, 4], [5]]
+    assert track["detected"] == 3
+    # Frame 5 scored low on its fitted box and was re-detected; frame 6 is
+    # fitted from the pose found with that retry box.
+    np.testing.assert_allclose(stub.boxes[5], _detector_box(5))
+    np.testing.assert_allclose(stub.boxes[6], _fitted(_detector_box(5)))
+    np.testing.assert_allclose(stub.boxes[7], _fitted(stub.boxes[6]))
@@ -0,0 +1,71 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+main = pytest.importorskip("main")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "POSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(main, "POSE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "POSE_CACHE_MAX_MB", 1)
+    monkeypatch.setattr(main, "_pose_cache_bytes", None)
+    return tmp_path
+
+
+def _files(root, suffix):
+    return sorted(path.name for path in root.rglob(f"*{suffix}"))
+
+
+def test_failed_write_removes_temp_file(cache_dir, monkeypatch):
+    with pytest.raises(TypeError):
+        main._pose_cache_put("aa-unserializable", {"bad": object()})
+    assert _files(cache_dir, ".tmp") == []
+
+    def no_space(src, dst):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(main.os, "replace", no_space)
+    main._pose_cache_put("bb-full", {"vectors": [[1.0, 2.0]]})
+    assert _files(cache_dir, ".tmp") == []
+    assert _files(cache_dir, ".json") == []
+
+
+def test_put_rescans_only_when_over_limit(cache_dir, monkeypatch):
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(main.os, "walk", lambda top: walks.append(top) or real_walk(top))
+    blob = {"vectors": ["x" * 1000] * 150}  # ~150 KB per entry
+
+    main._pose_cache_put("aa-first", blob)
+    assert len(walks) == 1  # first put establishes the running total
+    for index in range(4):
+        main._pose_cache_put(f"b{index}-entry", blob)
+    assert len(walks) == 1
+
+    for index in range(4):
+        os.utime(main._pose_cache_path(f"b{index}-entry"), (1000 + index, 1000 + index))
+    os.utime(main._pose_cache_path("aa-first"), (999, 999))
+    for index in range(4):
+        main._pose_cache_put(f"c{index}-entry", blob)
+    assert len(walks) > 1
+    assert main._pose_cache_bytes <= 1024 * 1024
+    remaining = _files(cache_dir, ".json")
+    assert "aa-first.json" not in remaining
+    assert "c3-entry.json" in remaining
+
+
+def test_evict_clears_stale_temp_files(cache_dir):
+    shard = cache_dir / "ab"
+    shard.mkdir()
+    stale = shard / "old.tmp"
+    stale.write_text("{")
+    os.utime(stale, (1000, 1000))
+    fresh = shard / "writing.tmp"
+    fresh.write_text("{")
+    main._pose_cache_evict()
+    assert _files(cache_dir, ".tmp") == ["writing.tmp"]
@@ -0,0 +1,130 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+main = pytest.importorskip("main")
+
+POSE = {"vectors": [[0.1, 0.2, 0.9], [0.2, 0.3, 0.8]], "meta": {"sample_fps": 10}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.server.lock:
+            self.server.hits[path] = self.server.hits.get(path, 0) + 1
+        if path.startswith("/pose"):
+            self._send(200, json.dumps(POSE).encode(), {"Content-Type": "application/json"})
+        elif path == "/redirect":
+            self._send(302, headers={"Location": "/pose.json"})
+        elif path == "/big":
+            self._send(200, b"x" * (2 * 1024 * 1024 + 1))
+        elif path == "/big-unsized":
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"x" * (2 * 1024 * 1024 + 1))
+            self.close_connection = True
+        elif path == "/trickle":
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b"x")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+        else:
+            self._send(404)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    # Clients hang up mid-body in the oversize and deadline tests.
+    httpd.handle_error = lambda request, client_address: None
+    httpd.lock = threading.Lock()
+    httpd.connections = 0
+    httpd.hits = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(main, "POSE_FETCH_MAX_MB", 1)
+    monkeypatch.setattr(main, "POSE_FETCH_TIMEOUT", 5.0)
+    main._http_idle.clear()
+    main._pose_fetch_cache.clear()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    for conns in main._http_idle.values():
+        for conn in conns:
+            conn.close()
+    main._http_idle.clear()
+    main._pose_fetch_cache.clear()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_get_reuses_connection(server):
+    httpd, base = server
+    for _ in range(3):
+        assert json.loads(main._http_get(f"{base}/pose.json")) == POSE
+    assert httpd.connections == 1
+
+
+def test_http_get_follows_redirect(server):
+    httpd, base = server
+    assert json.loads(main._http_get(f"{base}/redirect")) == POSE
+    assert httpd.hits == {"/redirect": 1, "/pose.json": 1}
+    assert httpd.connections == 1
+
+
+@pytest.mark.parametrize("path", ["/big", "/big-unsized"])
+def test_http_get_rejects_oversize_body(server, path):
+    _, base = server
+    with pytest.raises(ValueError, match="larger than"):
+        main._http_get(f"{base}{path}")
+
+
+def test_http_get_deadline_covers_whole_fetch(server, monkeypatch):
+    _, base = server
+    monkeypatch.setattr(main, "POSE_FETCH_TIMEOUT", 0.5)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        main._http_get(f"{base}/trickle")
+    assert time.monotonic() - started < 2.0
+
+
+def test_load_pose_json_lru(server, monkeypatch):
+    httpd, base = server
+    monkeypatch.setattr(main, "POSE_FETCH_CACHE_ENTRIES", 1)
+    first = main._load_pose_json(f"{base}/pose-a.json?token=1")
+    # A rotated signature on the same object path is a cache hit.
+    assert main._load_pose_json(f"{base}/pose-a.json?token=2") is first
+    assert httpd.hits == {"/pose-a.json": 1}
+    main._load_pose_json(f"{base}/pose-b.json")
+    main._load_pose_json(f"{base}/pose-a.json")
+    assert httpd.hits == {"/pose-a.json": 2, "/pose-b.json": 1}
@@ -0,0 +1,63 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+main = pytest.importorskip("main")
+
+
+def _reference_speaker(turns, start, end, default="unknown"):
+    """Full scan: the turn overlapping [start, end] the most, earliest on ties."""
+    best_speaker, best_overlap = default, 0.0
+    for diar in turns:
+        overlap = min(end, diar["end"]) - max(start, diar["start"])
+        if overlap > best_overlap:
+            best_speaker, best_overlap = diar["speaker"], overlap
+    return best_speaker
+
+
+def _turns(rng, count, span):
+    turns = []
+    for _ in range(count):
+        start = rng.uniform(0, span)
+        turns.append({"start": start, "end": start + rng.uniform(0.1, 8.0), "speaker": f"S{rng.randint(0, 4)}"})
+    return turns
+
+
+def test_speaker_matches_full_scan_with_overlaps():
+    rng = random.Random(1)
+    turns = _turns(rng, 400, 600.0)
+    turns.append({"start": 5.0, "end": 590.0, "speaker": "BACKGROUND"})
+    turns.append({"start": 100.0, "end": 104.0, "speaker": "TIE"})
+    turns.append({"start": 100.0, "end": 104.0, "speaker": "TIE_LATER"})
+    index = main._SpeakerIndex(turns)
+    queries = [(100.5, 103.5), (0.0, 1.0), (700.0, 710.0), (3.0, 3.0), (10.0, 8.0)]
+    for _ in range(500):
+        start = rng.uniform(-10, 620)
+        queries.append((start, start + rng.uniform(0.05, 30.0)))
+    for start, end in queries:
+        assert index.speaker(start, end) == _reference_speaker(turns, start, end)
+
+
+def test_speaker_index_empty():
+    assert main._SpeakerIndex([]).speaker(0.0, 1.0, "nobody") == "nobody"
+
+
+def test_assign_speakers_long_turn_stays_fast():
+    # One turn spanning the whole recording used to make every lookup walk back
+    # through all earlier turns.
+    rng = random.Random(2)
+    turns = [{"start": i * 0.18, "end": i * 0.18 + 0.15, "speaker": f"S{i % 3}"} for i in range(20000)]
+    turns.append({"start": 0.0, "end": 3600.0, "speaker": "ROOM"})
+    asr = []
+    for i in range(10000):
+        start = i * 0.36 + rng.uniform(0, 0.05)
+        asr.append({"start": start, "end": start + 0.3, "text": "x"})
+    started = time.perf_counter()
+    assigned = main._assign_speakers(asr, turns)
+    assert time.perf_counter() - started < 5.0
+    assert len(assigned) == len(asr)
+    assert {item["speaker"] for item in assigned} == {"ROOM"}